@@ -1,14 +1,79 @@
 import torch
 import os
+import copy
 import json
 import sqlite3
+import random
+import bisect
+import threading
+import numpy as np
 from nfsp_agent import NFSPAgent
+from Experience import ReservoirBuffer
+from bot_base import BotBase, style_epsilon
 
 """
 Run The GameVisuals Script To Run Project
 """
 
-class BotWrapper:
+# bot_experiences schema version (PRAGMA user_version): 1 stored states as JSON text, 2 as float32 BLOBs
+SCHEMA_VERSION = 2
+
+EXPERIENCE_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bot_name TEXT,
+        personality TEXT,
+        state BLOB,
+        action INTEGER,
+        reward REAL,
+        next_state BLOB,
+        done BOOLEAN,
+        win_type TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+#Raw float32 bytes of a state vector, as stored in the state/next_state BLOB columns.
+def pack_state(state):
+    return np.asarray(state, dtype=np.float32).tobytes()
+
+
+#Decodes many state BLOBs at once into an [N, state_size] tensor (one join, one frombuffer).
+def unpack_states(blobs, state_size):
+    flat = np.frombuffer(b"".join(blobs), dtype=np.float32)
+    return torch.from_numpy(flat.reshape(-1, state_size).copy())
+
+
+# One connection per database file, shared by every wrapper (and thread) using it
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def experience_db(path):
+    """
+    Opens (once) a WAL-mode connection to an experience database.
+    Returns:
+        (sqlite3.Connection, threading.Lock that must be held while using it)
+    """
+    with _connections_lock:
+        entry = _connections.get(path)
+        if entry is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            # WAL lets readers run alongside the writer and makes each commit a cheap log append
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            entry = _connections[path] = (conn, threading.Lock())
+        return entry
+
+
+#Whether row_id lies in one of the sorted (first, last) id ranges; firsts are their first ids.
+def _in_range(row_id, ranges, firsts):
+    i = bisect.bisect_right(firsts, row_id) - 1
+    return i >= 0 and row_id <= ranges[i][1]
+
+
+class BotWrapper(BotBase):
     """
     A wrapper around NFSPAgent that integrates:
     - Style-based behavior initialization
@@ -17,71 +82,83 @@ class BotWrapper:
     - Opponent modeling and profiling
     """
 
-    def __init__(self, name, style="default", state_size=20, action_size=3):
+    def __init__(self, name, style="default", state_size=20, action_size=3, shared_agent=None, prioritized_replay=False,
+                 holdout_fraction=0.0, holdout_size=2000):
         self.name = name
         self.style = style
-        self.agent = NFSPAgent(name, state_size, action_size)
+        # shared_agent lets several wrappers (one per table) train and act with the same networks
+        self.agent = NFSPAgent(name, state_size, action_size, shared_networks=shared_agent,
+                               prioritized_replay=prioritized_replay)
         self.opponent_stats = {}     # Tracks opponents' action frequencies
         self.opponent_profiles = {}  # Categorizes opponents based on behavior
         os.makedirs("training_logs", exist_ok=True)
         self.db_path = f"training_logs/{name}_experiences.sqlite"
+        self.db, self.db_lock = experience_db(self.db_path)
         self._init_db()
 
-        # Style-specific Q-biasing
-        self.agent.initialise_with_style(style)
+        # Style-specific Q-biasing (shared networks were already biased by their owner)
+        if shared_agent is None:
+            self.agent.initialise_with_style(style)
 
         # Exploration adjustment based on style
-        if style == "strategist":
-            self.agent.epsilon = 0.05
-        elif style == "novice":
-            self.agent.epsilon = 0.3
-        else:
-            self.agent.epsilon = 0.1
+        self.agent.epsilon = style_epsilon(style)
 
         self.last_state_tensor = None
         self.last_chip_count = 1000
+        self.new_transitions = 0  # Since the training scheduler last looked
+        self.unsaved_transitions = 0  # Newest RL buffer rows not yet written to SQLite
+        self.saved_ranges = []  # (first id, last id) of rows written since the last load; already in the RL buffer
+        self.writer = None  # ExperienceWriter the last save was queued on, if any
+
+        # Optional held-out (state, action) pairs, diverted from SL training, for measuring accuracy
+        self.holdout_fraction = holdout_fraction
+        self.holdout = ReservoirBuffer.for_imitation(holdout_size, state_size) if holdout_fraction > 0 else None
 
-    def compute_policy_accuracy(self):
+    def compute_policy_accuracy(self, sample_size=None, use_holdout=None, chunk_size=4096):
         """
         Evaluates how well the policy net replicates stored SL behavior.
+        Runs batched forward passes of chunk_size rows over either the whole SL
+        buffer, a random sample_size subset of it, or the held-out set
+        (used by default when the bot was built with a holdout_fraction).
         Returns:
             float: Proportion of correctly predicted actions.
         """
-        if len(self.agent.sl_buffer.buffer) == 0:
+        if use_holdout is None:
+            use_holdout = self.holdout is not None and len(self.holdout) > 0
+        buffer = self.holdout if use_holdout else self.agent.sl_buffer
+        if buffer is None or len(buffer) == 0:
             return 0.0
 
+        if sample_size and sample_size < len(buffer):
+            states, actions = buffer.sample(sample_size)
+        else:
+            states, actions = buffer.filled()
+
         correct = 0
-        total = 0
+        with torch.no_grad():
+            for start in range(0, len(actions), chunk_size):
+                logits = self.agent.policy_net(states[start:start + chunk_size])
+                correct += (logits.argmax(dim=1) == actions[start:start + chunk_size]).sum().item()
 
-        for state, true_action in self.agent.sl_buffer.buffer:
-            with torch.no_grad():
-                logits = self.agent.policy_net(state.unsqueeze(0))
-                predicted_action = torch.argmax(logits).item()
+        return correct / len(actions)
+    
+    #Bot state vector from GameLoop.get_bot_state's feature list.
+    def make_state(self, features):
+        return torch.tensor(features, dtype=torch.float32)
 
-            if predicted_action == int(true_action):
-                correct += 1
-            total += 1
+    @staticmethod
+    def stack_states(state_tensors):
+        return torch.stack(state_tensors)
 
-        return correct / total
-    
-    #Uses the Q-network to select an action, then maps index to name.
-    def decide_action(self, state_tensor, can_check=False):
-        self.last_state_tensor = state_tensor
-        action_index = self.agent.select_action(state_tensor, use_avg_policy=False)
-        return self.index_to_action(action_index, can_check)
-
-    #Maps action index to string label.
-    def index_to_action(self, index, can_check):
-        mapping = ["fold", "call", "raise"]
-        action = mapping[index]
-        if can_check and action == "call":
-            return "check"
-        return action
-    
     #Stores both an RL tuple and a supervised (state, action) snapshot.
     def store_experience(self, state, action, reward, next_state, done):
         self.agent.store_rl((state, action, reward, next_state, done))
-        self.agent.store_sl(state, action)
+        self.new_transitions += 1
+        self.unsaved_transitions += 1
+        if self.holdout is not None and random.random() < self.holdout_fraction:
+            self.holdout.push((state, action))
+        else:
+            self.agent.store_sl(state, action)
 
     #Stores a (state, action) pair for SL imitation training.
     def store_imitation(self, state, action):
@@ -89,129 +166,243 @@ class BotWrapper:
 
     #Updates the final stored transition with a terminal reward.
     def store_final_reward(self, final_reward):
-        if not self.agent.rl_buffer.buffer:
+        if len(self.agent.rl_buffer) == 0:
             return
 
-        state, action, _, next_state, _ = self.agent.rl_buffer.buffer[-1]
-        self.agent.rl_buffer.buffer[-1] = (state, action, final_reward, next_state, True)
+        self.agent.rl_buffer.update_last(reward=final_reward, done=True)
 
     #Loads past experiences from disk, trains both Q and policy networks.
-    def train(self, batch_size=32, gamma=0.99):
-        experiences = self.load_experiences_from_sqlite(limit=10000)
-        if len(experiences) < batch_size:
+    def train(self, batch_size=32, gamma=0.99, steps=1, agent=None):
+        """
+        Brings the RL buffer up to date with SQLite and takes steps gradient steps on each network.
+        The first call loads the newest 10000 rows; later calls only fetch rows
+        added since (the buffer's source_position watermark) and merge them in.
+        agent defaults to this bot's own; a TrainingScheduler running in the
+        background passes a learner copy so play keeps the current weights.
+        """
+        agent = agent or self.agent
+        buffer = agent.rl_buffer
+        new_rows = self.sync_replay_buffer(agent)
+
+        if len(buffer) < batch_size:
             print(f"[TRAIN] Not enough data to train {self.name}.")
             return
 
-        self.agent.rl_buffer.buffer.clear()
-        for exp in experiences:
-            self.agent.rl_buffer.push(exp)
+        for _ in range(steps):
+            agent.train_rl(batch_size, gamma)
+            agent.train_policy(batch_size)
+        print(f"[TRAIN] {self.name} trained on {len(buffer)} samples ({new_rows} new, {steps} steps).")
 
-        self.agent.train_rl(batch_size, gamma)
-        self.agent.train_policy(batch_size)
-        print(f"[TRAIN] {self.name} trained on {len(experiences)} samples.")
+    def sync_replay_buffer(self, agent=None):
+        """
+        Merges experience rows added to SQLite since the last call into agent's RL buffer.
+        Returns:
+            int: rows added to the buffer.
+        """
+        agent = agent or self.agent
+        buffer = agent.rl_buffer
+        if self.writer is not None:
+            self.writer.flush()  # Queued rows must be in SQLite (and in saved_ranges) before loading
+        if buffer.source_position == 0:
+            experiences, last_id = self.load_experiences_from_sqlite(limit=10000)
+            buffer.clear()
+        else:
+            # Rows this wrapper saved itself are already in its own buffer
+            skip_ranges = self.saved_ranges if agent is self.agent else ()
+            experiences, last_id = self.load_experiences_from_sqlite(after_id=buffer.source_position, skip_ranges=skip_ranges)
+        self.saved_ranges = []
 
-    def save_experiences_to_sqlite(self, win_type="unknown"):
+        new_rows = 0
+        if experiences is not None:
+            buffer.push_batch(*experiences)
+            new_rows = len(experiences[1])
+        buffer.source_position = max(buffer.source_position, last_id)
+        return new_rows
+
+    def save_experiences_to_sqlite(self, win_type="unknown", writer=None):
         """
-        Persists the current RL buffer to SQLite for long-term training use.
+        Persists the RL transitions stored since the last save to SQLite for long-term training use.
+        Rows are encoded here; with an experience_writer.ExperienceWriter the
+        insert itself happens on its background thread.
         """
-        data = list(self.agent.rl_buffer.buffer)
+        data = self.agent.rl_buffer.recent(self.unsaved_transitions)
+        self.unsaved_transitions = 0
         if not data:
             return
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        rows = [
+            (self.name, self.style, pack_state(state), int(action), float(reward), pack_state(next_state), bool(done), win_type)
+            for state, action, reward, next_state, done in data
+        ]
+        if writer is None:
+            self.write_experience_rows(rows)
+        else:
+            self.writer = writer
+            writer.submit(self, rows)
 
-        for state, action, reward, next_state, done in data:
-            cursor.execute("""
-                INSERT INTO bot_experiences 
+    #Inserts encoded rows in one transaction and records their id range.
+    def write_experience_rows(self, rows):
+        # ids are consecutive because the write lock is held throughout
+        with self.db_lock, self.db:
+            self.db.executemany("""
+                INSERT INTO bot_experiences
                 (bot_name, personality, state, action, reward, next_state, done, win_type)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                self.name,
-                self.style,
-                json.dumps(state.tolist()),
-                int(action),
-                float(reward),
-                json.dumps(next_state.tolist()),
-                bool(done),
-                win_type
-            ))
+            """, rows)
+            last_id = self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
 
-        conn.commit()
-        conn.close()
-        print(f"[SQLITE] {self.name} stored {len(data)} experiences.")
+        first_id = last_id - len(rows) + 1
+        if self.saved_ranges and self.saved_ranges[-1][1] == first_id - 1:
+            self.saved_ranges[-1] = (self.saved_ranges[-1][0], last_id)  # Merge with the previous save
+        else:
+            self.saved_ranges.append((first_id, last_id))
+        print(f"[SQLITE] {self.name} stored {len(rows)} experiences.")
+
+    #Highest experience row id in this bot's database (0 when empty).
+    def last_experience_id(self):
+        with self.db_lock:
+            return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM bot_experiences").fetchone()[0]
+
+    #Deletes rows written after last_id and rewinds the id sequence, so new rows get the ids they had before.
+    def truncate_experiences(self, last_id):
+        with self.db_lock, self.db:
+            self.db.execute("DELETE FROM bot_experiences WHERE id > ?", (last_id,))
+            self.db.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'bot_experiences'", (last_id,))
+
+    def state_dict(self):
+        """
+        Copies of this seat's learning state (not the networks, see NFSPAgent.network_state):
+        buffers, epsilon, opponent model and SQLite bookkeeping.
+        Returns:
+            dict that load_state_dict accepts.
+        """
+        if self.writer is not None:
+            self.writer.flush()  # So saved_ranges covers every row handed to the writer
+        return {
+            "agent": self.agent.buffer_state(),
+            "holdout": self.holdout.state_dict() if self.holdout is not None else None,
+            "opponent_stats": copy.deepcopy(self.opponent_stats),
+            "opponent_profiles": dict(self.opponent_profiles),
+            "new_transitions": self.new_transitions,
+            "unsaved_transitions": self.unsaved_transitions,
+            "saved_ranges": list(self.saved_ranges),
+        }
+
+    def load_state_dict(self, state):
+        self.agent.load_buffer_state(state["agent"])
+        if self.holdout is not None and state["holdout"] is not None:
+            self.holdout.load_state_dict(state["holdout"])
+        self.opponent_stats = state["opponent_stats"]
+        self.opponent_profiles = state["opponent_profiles"]
+        self.new_transitions = state["new_transitions"]
+        self.unsaved_transitions = state["unsaved_transitions"]
+        self.saved_ranges = list(state["saved_ranges"])
 
-    #initialises the local SQLite database for storing transitions.
+    #initialises the local SQLite database for storing transitions, migrating older schemas.
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        with self.db_lock:
+            cursor = self.db.cursor()
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bot_experiences'"
+            ).fetchone()
+
+            if exists and version < SCHEMA_VERSION:
+                self._migrate_to_blobs(self.db)
+            else:
+                cursor.execute(EXPERIENCE_TABLE.format(name="bot_experiences"))
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self.db.commit()
+
+    def _migrate_to_blobs(self, conn, chunk_size=5000):
+        """
+        Converts a version 1 table (JSON text states) to float32 BLOBs,
+        keeping row ids so load watermarks stay valid. Unparseable rows are dropped.
+        """
         cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bot_experiences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bot_name TEXT,
-                personality TEXT,
-                state TEXT,
-                action INTEGER,
-                reward REAL,
-                next_state TEXT,
-                done BOOLEAN,
-                win_type TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
+        cursor.execute("DROP TABLE IF EXISTS bot_experiences_migrated")
+        cursor.execute(EXPERIENCE_TABLE.format(name="bot_experiences_migrated"))
+
+        reader = conn.cursor()
+        reader.execute("""
+            SELECT id, bot_name, personality, state, action, reward, next_state, done, win_type, timestamp
+            FROM bot_experiences ORDER BY id
         """)
+        migrated = 0
+        while True:
+            rows = reader.fetchmany(chunk_size)
+            if not rows:
+                break
+            converted = []
+            for row_id, bot_name, personality, state, action, reward, next_state, done, win_type, timestamp in rows:
+                try:
+                    converted.append((row_id, bot_name, personality, pack_state(json.loads(state)), action, reward,
+                                      pack_state(json.loads(next_state)), done, win_type, timestamp))
+                except (TypeError, ValueError):
+                    continue  # Skip bad data
+            cursor.executemany("""
+                INSERT INTO bot_experiences_migrated
+                (id, bot_name, personality, state, action, reward, next_state, done, win_type, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, converted)
+            migrated += len(converted)
+
+        cursor.execute("DROP TABLE bot_experiences")
+        cursor.execute("ALTER TABLE bot_experiences_migrated RENAME TO bot_experiences")
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
-        conn.close()
+        conn.execute("VACUUM")  # Give the space freed by the text columns back to the filesystem
+        print(f"[SQLITE] Migrated {migrated} {self.name} experiences to binary storage.")
 
-    def load_experiences_from_sqlite(self, limit=10000):
+    def load_experiences_from_sqlite(self, limit=10000, after_id=None, skip_ranges=()):
         """
-        Loads past transitions for replay training.
+        Loads past transitions for replay training: the newest limit rows, or
+        with after_id every row with a larger id outside the (first, last) id
+        ranges in skip_ranges.
         Returns:
-            list of (state, action, reward, next_state, done) tuples
-        """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT state, action, reward, next_state, done
-            FROM bot_experiences
-            ORDER BY id DESC
-            LIMIT ?
-        """, (limit,))
-        rows = cursor.fetchall()
-        conn.close()
-
-        experiences = []
-        for state, action, reward, next_state, done in rows:
-            try:
-                experiences.append((
-                    torch.tensor(json.loads(state)),
-                    int(action),
-                    float(reward),
-                    torch.tensor(json.loads(next_state)),
-                    bool(done)
-                ))
-            except Exception:
-                continue  # Skip bad data
-
-        return experiences
-
-    def update_opponent_profile(self):
+            ((states, actions, rewards, next_states, dones) tensors oldest first, or None if no rows,
+             highest row id read)
         """
-        Classifies each opponent into one of 4 profiles based on long-term stats:
-        aggressive, tight, loose, or balanced.
-        """
-        for name, stats in self.opponent_stats.items():
-            rounds = max(1, stats.get("rounds", 1))
-            raise_rate = stats.get("raise", 0) / rounds
-            fold_rate = stats.get("fold", 0) / rounds
-            call_rate = stats.get("call", 0) / rounds
-
-            if raise_rate > 0.4:
-                profile = "aggressive"
-            elif fold_rate > 0.5:
-                profile = "tight"
-            elif call_rate > 0.5 and raise_rate < 0.2:
-                profile = "loose"
+        # Both queries are range scans of the rowid B-tree (id is the INTEGER PRIMARY KEY), so no extra index is needed
+        with self.db_lock:
+            cursor = self.db.cursor()
+            if after_id is None:
+                cursor.execute("""
+                    SELECT id, state, action, reward, next_state, done
+                    FROM bot_experiences
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (limit,))
+                rows = cursor.fetchall()[::-1]
             else:
-                profile = "balanced"
+                cursor.execute("""
+                    SELECT id, state, action, reward, next_state, done
+                    FROM bot_experiences
+                    WHERE id > ?
+                    ORDER BY id
+                """, (after_id,))
+                rows = cursor.fetchall()
+
+        # Skipped rows still count as read
+        last_id = max([rows[-1][0] if rows else 0] + [last for _first, last in skip_ranges])
+        if skip_ranges:
+            # Filtered here: one NOT BETWEEN per range would exceed SQLite's expression depth limit
+            skip_ranges = sorted(skip_ranges)
+            firsts = [first for first, _last in skip_ranges]
+            rows = [row for row in rows if not _in_range(row[0], skip_ranges, firsts)]
+
+        state_bytes = self.agent.state_size * 4
+        rows = [row for row in rows if isinstance(row[1], bytes) and isinstance(row[4], bytes)
+                and len(row[1]) == len(row[4]) == state_bytes]  # Skip bad data
+        if not rows:
+            return None, last_id
 
-            self.opponent_profiles[name] = profile
+        _ids, states, actions, rewards, next_states, dones = zip(*rows)
+        experiences = (
+            unpack_states(states, self.agent.state_size),
+            torch.tensor(actions, dtype=torch.int64),
+            torch.tensor(rewards, dtype=torch.float32),
+            unpack_states(next_states, self.agent.state_size),
+            torch.tensor(dones, dtype=torch.float32),
+        )
+        return experiences, last_id
@@ -1,5 +1,7 @@
-from collections import deque
 import random
+from collections import deque
+import numpy as np
+import torch
 
 """
 Run The GameVisuals Script To Run Project
@@ -7,23 +9,346 @@ Run The GameVisuals Script To Run Project
 
 class ReplayBuffer:
     """
-    A simple experience replay buffer supporting both:
-    - Reinforcement Learning (RL)
-    - Supervised Learning (SL)
+    A ring buffer of experiences stored column-wise in contiguous tensors, supporting both:
+    - Reinforcement Learning (RL): (state, action, reward, next_state, done)
+    - Supervised Learning (SL): (state, action)
+
+    Pushing copies one row at the write index; sampling draws one index tensor
+    and gathers every column with fancy indexing. Storage grows geometrically
+    up to capacity, so a mostly-empty buffer stays small.
     """
-    
-    #initialises the buffer with a maximum size.
-    def __init__(self, capacity):
-        self.buffer = deque(maxlen=capacity)
 
-    #Adds a new experience tuple to the buffer.
+    INITIAL_ROWS = 1024
+
+    #initialises the buffer with a maximum size and one (name, shape, dtype) per column.
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = [name for name, _shape, _dtype in fields]
+        rows = min(capacity, self.INITIAL_ROWS)
+        self.columns = [torch.zeros((rows, *shape), dtype=dtype) for _name, shape, dtype in fields]
+        self.index = 0  # Next row to write
+        self.size = 0
+        self.source_position = 0  # How far an external store has been read into the buffer (e.g. a SQLite row id)
+
+    #Buffer for (state, action, reward, next_state, done) transitions.
+    @classmethod
+    def for_transitions(cls, capacity, state_size):
+        return cls(capacity, [
+            ("state", (state_size,), torch.float32),
+            ("action", (), torch.int64),
+            ("reward", (), torch.float32),
+            ("next_state", (state_size,), torch.float32),
+            ("done", (), torch.float32),
+        ])
+
+    #Buffer for (state, action) imitation pairs.
+    @classmethod
+    def for_imitation(cls, capacity, state_size):
+        return cls(capacity, [
+            ("state", (state_size,), torch.float32),
+            ("action", (), torch.int64),
+        ])
+
+    #Doubles storage (up to capacity) once the allocated rows are used up.
+    def _grow(self, needed):
+        rows = len(self.columns[0])
+        if needed <= rows or rows >= self.capacity:
+            return
+        new_rows = min(self.capacity, max(needed, rows * 2))
+        for i, column in enumerate(self.columns):
+            grown = torch.zeros((new_rows, *column.shape[1:]), dtype=column.dtype)
+            grown[:rows] = column
+            self.columns[i] = grown
+
+    #Adds a new experience tuple to the buffer (a single row copy per column).
     def push(self, item):
-        self.buffer.append(item)
+        if self.size < self.capacity:
+            self._grow(self.size + 1)
+        for column, value in zip(self.columns, item):
+            column[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    #Adds many experiences at once from one tensor per column.
+    def push_batch(self, *columns):
+        count = len(columns[0])
+        if count > self.capacity:
+            columns = [column[-self.capacity:] for column in columns]
+            count = self.capacity
+        if self.size < self.capacity:
+            self._grow(self.size + count)
+        rows = (self.index + torch.arange(count)) % self.capacity
+        for column, values in zip(self.columns, columns):
+            column[rows] = values.to(column.dtype)
+        self.index = (self.index + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
 
-    #Randomly samples a batch of experiences.
+    #Randomly samples a batch, returned as one tensor per column.
     def sample(self, batch_size):
-        return random.sample(self.buffer, min(len(self.buffer), batch_size))
-    
+        if self.size <= batch_size:
+            indices = torch.randperm(self.size)
+        else:
+            # Independent draws (with replacement) keep sampling O(batch_size)
+            indices = torch.randint(0, self.size, (batch_size,))
+        return tuple(column[indices] for column in self.columns)
+
+    #Row indices in insertion order (oldest first).
+    def _ordered_rows(self):
+        if self.size < self.capacity:
+            return torch.arange(self.size)
+        return (self.index + torch.arange(self.size)) % self.capacity
+
+    #Copies of every column in insertion order.
+    def arrays(self):
+        rows = self._ordered_rows()
+        return tuple(column[rows] for column in self.columns)
+
+    #Views of the filled rows in storage order (no copy); for whole-buffer passes where order doesn't matter.
+    def filled(self):
+        return tuple(column[:self.size] for column in self.columns)
+
+    #The newest n experiences as tuples (oldest first).
+    def recent(self, n):
+        rows = self._ordered_rows()[-n:] if n > 0 else torch.arange(0)
+        return [self._row(int(row)) for row in rows]
+
+    #Overwrites named fields of the most recent experience.
+    def update_last(self, **values):
+        if self.size == 0:
+            return
+        last = (self.index - 1) % self.capacity
+        for name, value in values.items():
+            self.columns[self.fields.index(name)][last] = value
+
+    def clear(self):
+        self.index = 0
+        self.size = 0
+        self.source_position = 0
+
+    #Copies of the stored rows and counters (storage order), for checkpoints.
+    def state_dict(self):
+        return {
+            "columns": [column.clone() for column in self.filled()],
+            "index": self.index,
+            "size": self.size,
+            "source_position": self.source_position,
+        }
+
+    def load_state_dict(self, state):
+        self.clear()
+        self._grow(state["size"])
+        for column, values in zip(self.columns, state["columns"]):
+            column[:len(values)] = values
+        self.index = state["index"]
+        self.size = state["size"]
+        self.source_position = state["source_position"]
+
+    def _row(self, row):
+        return tuple(
+            column[row].clone() if column.dim() > 1 else column[row].item()
+            for column in self.columns
+        )
+
+    #Iterates over copies of the stored experiences (oldest first).
+    def __iter__(self):
+        columns = [column.unbind(0) if column.dim() > 1 else column.tolist() for column in self.arrays()]
+        return zip(*columns)
+
     #Returns the current number of elements stored in the buffer.
     def __len__(self):
-        return len(self.buffer)
+        return self.size
+
+
+class ReservoirBuffer(ReplayBuffer):
+    """
+    Fixed-size buffer that keeps a uniform random sample of every item ever
+    pushed (reservoir sampling), rather than only the newest ones. Used for the
+    NFSP supervised buffer so the average policy covers the whole run.
+    """
+
+    RECENT_ITEMS = 16
+
+    def __init__(self, capacity, fields):
+        super().__init__(capacity, fields)
+        self.seen = 0  # Total items pushed over the buffer's lifetime
+        self.recent_items = deque(maxlen=self.RECENT_ITEMS)
+
+    #Keeps the item with probability capacity / seen, replacing a random slot (O(1)).
+    def push(self, item):
+        self.seen += 1
+        self.recent_items.append(tuple(value.clone() if torch.is_tensor(value) else value for value in item))
+        if self.size < self.capacity:
+            super().push(item)
+            return
+        slot = random.randrange(self.seen)
+        if slot < self.capacity:
+            for column, value in zip(self.columns, item):
+                column[slot] = value
+
+    def push_batch(self, *columns):
+        count = len(columns[0])
+        fill = min(count, self.capacity - self.size)
+        if fill:
+            super().push_batch(*(column[:fill] for column in columns))
+
+        # Remaining items each draw a slot in [0, position) and replace it if it lands inside the buffer
+        remaining = count - fill
+        if remaining:
+            positions = self.seen + fill + torch.arange(1, remaining + 1)
+            slots = (torch.rand(remaining, dtype=torch.float64) * positions).long()
+            for k in (slots < self.capacity).nonzero().flatten().tolist():
+                for column, values in zip(self.columns, columns):
+                    column[slots[k]] = values[fill + k]
+        self.seen += count
+
+        for k in range(max(0, count - self.RECENT_ITEMS), count):
+            self.recent_items.append(tuple(
+                values[k].clone() if values.dim() > 1 else values[k].item() for values in columns
+            ))
+
+    #The newest n pushed items, whether or not they were kept in the reservoir.
+    def recent(self, n):
+        return list(self.recent_items)[-n:] if n > 0 else []
+
+    def clear(self):
+        super().clear()
+        self.seen = 0
+        self.recent_items.clear()
+
+    def state_dict(self):
+        state = super().state_dict()
+        state["seen"] = self.seen
+        state["recent_items"] = list(self.recent_items)
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.seen = state["seen"]
+        self.recent_items.extend(state["recent_items"])
+
+
+class SumTree:
+    """
+    Binary tree over leaf priorities where each node holds the sum of its
+    children, giving O(log n) updates and prefix-sum lookups.
+    """
+
+    def __init__(self, capacity):
+        self.leaves = 1 << max(0, capacity - 1).bit_length()
+        self.nodes = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def update(self, index, priority):
+        node = index + self.leaves
+        self.nodes[node] = priority
+        node //= 2
+        while node >= 1:
+            self.nodes[node] = self.nodes[2 * node] + self.nodes[2 * node + 1]
+            node //= 2
+
+    #Leaf indices whose cumulative priority range contains each value (all values descend together).
+    def find(self, values):
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            left_sum = self.nodes[left]
+            go_right = values > left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = left + go_right
+        return nodes - self.leaves
+
+    def priority(self, indices):
+        return self.nodes[np.asarray(indices) + self.leaves]
+
+    @property
+    def total(self):
+        return self.nodes[1]
+
+    def clear(self):
+        self.nodes[:] = 0.0
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer that samples transitions in proportion to priority^alpha
+    (their last TD error), backed by a SumTree. New and terminal transitions
+    get the current max priority so they are sampled at least once, and
+    sample_prioritized returns importance-sampling weights (annealed towards
+    beta=1) to correct the bias in the Q loss.
+    """
+
+    def __init__(self, capacity, fields, alpha=0.6, beta=0.4, beta_increment=1e-4, epsilon=1e-3):
+        super().__init__(capacity, fields)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+
+    def push(self, item):
+        index = self.index
+        super().push(item)
+        self.tree.update(index, self.max_priority ** self.alpha)
+
+    def push_batch(self, *columns):
+        count = min(len(columns[0]), self.capacity)
+        start = self.index
+        super().push_batch(*columns)
+        for offset in range(count):
+            self.tree.update((start + offset) % self.capacity, self.max_priority ** self.alpha)
+
+    #Terminal rewards are the rare informative transitions, so bump them to max priority.
+    def update_last(self, **values):
+        super().update_last(**values)
+        if self.size:
+            self.tree.update((self.index - 1) % self.capacity, self.max_priority ** self.alpha)
+
+    def sample_prioritized(self, batch_size):
+        """
+        Returns:
+            (columns tuple, [B] row indices, [B] float32 importance-sampling weights)
+        """
+        if self.size < batch_size:
+            # Every row once, as sample() returns it, so callers can tell the batch is short
+            indices = torch.randperm(self.size).numpy()
+            rows = torch.from_numpy(indices)
+            return tuple(column[rows] for column in self.columns), indices, torch.ones(self.size)
+
+        # One stratified draw per segment of the total priority mass
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        indices = np.minimum(self.tree.find(np.minimum(values, total - 1e-12)), self.size - 1)
+
+        probabilities = self.tree.priority(indices) / total
+        weights = (self.size * np.maximum(probabilities, 1e-12)) ** (-self.beta)
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        rows = torch.from_numpy(indices)
+        columns = tuple(column[rows] for column in self.columns)
+        return columns, indices, torch.tensor(weights, dtype=torch.float32)
+
+    #Sets new priorities from the absolute TD errors of a sampled batch.
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max(initial=0.0)))
+        for index, priority in zip(indices.tolist(), priorities.tolist()):
+            self.tree.update(index, priority ** self.alpha)
+
+    def clear(self):
+        super().clear()
+        self.tree.clear()
+        self.max_priority = 1.0
+
+    def state_dict(self):
+        state = super().state_dict()
+        state.update(tree=self.tree.nodes.copy(), beta=self.beta, max_priority=self.max_priority)
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.tree.nodes[:] = state["tree"]
+        self.beta = state["beta"]
+        self.max_priority = state["max_priority"]
@@ -1,11 +1,11 @@
-import torch
 import time
 import random
 import json
-import os
 from collections import Counter
 from itertools import combinations
-from Bots import BotWrapper
+from training_scheduler import TrainingScheduler
+from training_log import TrainingLog
+from hand_evaluator import card_index, evaluate_cards, HandState
 
 """
 Run The GameVisuals Script To Run Project
@@ -28,10 +28,41 @@ rank_values = {
     "Spades": 0, "Hearts": 1, "Clubs": 2, "Diamonds": 3
 }
 
+value_names = {value: name for name, value in card_values.items()}
+
+# Bot state layout: 20 base features, plus equity at index 20 when GameLoop has an equity_engine
+STATE_SIZE = 20
+EQUITY_FEATURE = 20
+EQUITY_STATE_SIZE = 21
+
 class Card:
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    # A card is one int 0-51 (see hand_evaluator.card_index); value and suit_index are
+    # cached alongside it and the string rank/suit are only rendered for the UI and logs.
+    __slots__ = ("code", "value", "suit_index")
+
+    def __init__(self, rank, suit=None):
+        # Card("Ace", "Spades") from names, or Card(code) from an int 0-51
+        code = rank if suit is None else card_index(card_values[rank], rank_values[suit])
+        self.code = code
+        self.value = (code >> 2) + 2
+        self.suit_index = code & 3
+
+    @property
+    def rank(self):
+        return value_names[self.value]
+
+    @property
+    def suit(self):
+        return suits[self.suit_index]
+
+    def __int__(self):
+        return self.code
+
+    def __eq__(self, other):
+        return isinstance(other, Card) and other.code == self.code
+
+    def __hash__(self):
+        return self.code
 
     def __str__(self):
         return f"{self.rank} of {self.suit}"
@@ -40,27 +71,38 @@ class Card:
         return f"Card('{self.rank}', '{self.suit}')"
 
     def get_card_ranks(hand):
-        return sorted([card_values[card.rank] for card in hand], reverse=True)
+        return sorted([card.value for card in hand], reverse=True)
 
     def count_ranks(hand):
         values = [card.rank for card in hand]
         return Counter(values)
 
+# One shared instance per card, so dealing never allocates Card objects
+CARDS = [Card(code) for code in range(52)]
+FULL_DECK = tuple(range(52))
+
 class Deck:
+    # Holds the undealt cards as ints; draw_card hands out the shared Card instances
     def __init__(self):
-        self.cards = [Card(rank, suit) for rank in ranks for suit in suits]
+        self.cards = list(FULL_DECK)
+        self.shuffle()
+
+    # Refills and reshuffles in place so a new hand reuses the same list
+    def reset(self):
+        self.cards[:] = FULL_DECK
         self.shuffle()
 
     def shuffle(self):
         random.shuffle(self.cards)
 
     def draw_card(self):
-        return self.cards.pop() if self.cards else None
+        return CARDS[self.cards.pop()] if self.cards else None
 class Player:
     def __init__(self, name, chips=2500, is_bot = False, bot_instance = None):
         self.name = name
         self.chips = chips
         self.hand = []
+        self.hand_state = None  # Incremental best-hand strength (HandState), updated as the board is revealed
         self.folded = False
         self.checked = False
         self.bet = 0
@@ -90,6 +132,15 @@ class PokerHandEvaluator:
         suits = [card.suit for card in hand]
         return len(set(suits)) == 1
 
+    # Single comparable integer for the best hand in hole + community cards (see hand_evaluator).
+    # Orders hands exactly like evaluate_five_card_hand but without the 21-combination search.
+    @staticmethod
+    def hand_strength(hand, community_cards=None):
+        cards = hand + community_cards if community_cards else hand
+        if not community_cards and len(hand) != 5:
+            return 0  # Same as evaluate_five_card_hand's invalid (0, [])
+        return evaluate_cards([card.code for card in cards])
+
     # Evaluates a 5-card poker hand or best 5-card hand from a larger set (e.g. hole + community)
     @staticmethod
     def evaluate_five_card_hand(hand, community_cards=None):
@@ -286,8 +337,25 @@ class BettingManager:
 
 class GameLoop:
     # Main orchestrator for a single game of poker (manages state, players, betting, AI, and training)
-    def __init__(self, player_objs=None, player_names=None, starting_chips=2500):
+    def __init__(self, player_objs=None, player_names=None, starting_chips=2500, play_only=False, equity_engine=None,
+                 accuracy_interval=1, accuracy_sample_size=None, training_scheduler=None, experience_writer=None,
+                 training_log=None, checkpointer=None):
         self.deck = Deck()  # Fresh deck of cards
+        self.play_only = play_only  # Skip disk logging, SQLite persistence and training (self-play workers)
+        # Optional equity.EquityEngine or strength_tables.StrengthTables: adds a win-probability
+        # feature (bots need state_size=EQUITY_STATE_SIZE)
+        self.equity_engine = equity_engine
+        # Policy accuracy is logged every accuracy_interval rounds, optionally on a random sample of each SL buffer
+        self.accuracy_interval = accuracy_interval
+        self.accuracy_sample_size = accuracy_sample_size
+        # Decides when bots train; the default trains every bot once after every hand
+        self.training_scheduler = training_scheduler or TrainingScheduler()
+        # Optional experience_writer.ExperienceWriter: SQLite inserts move off the game thread
+        self.experience_writer = experience_writer
+        # Append-only round/accuracy logs; shared by every table in the process unless one is given
+        self._training_log = training_log
+        # Optional checkpoint.Checkpointer: periodic snapshots of the bots' learning state for resuming
+        self.checkpointer = checkpointer
 
         # initialise players either from pre-built objects or from a name list (bots auto-wrapped)
         if player_objs:
@@ -296,6 +364,7 @@ class GameLoop:
             self.players = []
             for name in player_names:
                 if "AI" in name:
+                    from Bots import BotWrapper  # Imported here so torch-free bots never load torch
                     bot = BotWrapper(name)
                     self.players.append(Player(name, starting_chips, is_bot=True, bot_instance=bot))
                 else:
@@ -320,6 +389,8 @@ class GameLoop:
 
         self.initial_player_names = [p.name for p in player_objs] if player_objs else player_names
         self.games_won = {name: 0 for name in self.initial_player_names}
+        if checkpointer:
+            checkpointer.add_game(self)
 
     # Deals 2 hole cards to each active (non-eliminated) player and sets up blinds and betting order
     def deal_hole_cards(self):
@@ -327,6 +398,7 @@ class GameLoop:
             if player.eliminated:
                 continue
             player.hand = [self.deck.draw_card(), self.deck.draw_card()]
+            player.hand_state = HandState([card.code for card in player.hand])
         self.betting_manager.set_blinds()
         self.post_blinds()
         self.betting_manager.build_betting_order(self.state)
@@ -336,6 +408,12 @@ class GameLoop:
     def reveal_community_cards(self, num):
         drawn = [self.deck.draw_card() for _ in range(num)]
         self.community_cards.extend(drawn)
+
+        # Keep each live player's best-hand strength current for this street
+        codes = [card.code for card in drawn]
+        for player in self.players:
+            if player.hand_state and not player.folded and not player.eliminated:
+                player.hand_state.add_cards(codes)
         return drawn
 
     # Manages the logic for one betting round: advancing if betting conditions are met
@@ -412,10 +490,10 @@ class GameLoop:
     def get_bot_state(self, player):
         # Extract bot's hole card info (rank and suit as ints)
         card1, card2 = player.hand
-        rank1 = card_values[card1.rank]
-        suit1 = rank_values[card1.suit]
-        rank2 = card_values[card2.rank]
-        suit2 = rank_values[card2.suit]
+        rank1 = card1.value
+        suit1 = card1.suit_index
+        rank2 = card2.value
+        suit2 = card2.suit_index
 
         # Positional and contextual game features
         position_index = next((i for i, p in enumerate(self.players) if p.name == player.name), -1)
@@ -426,8 +504,8 @@ class GameLoop:
         # Encode community cards as flat list of rank/suit pairs (max 5 cards)
         community_vals = []
         for card in self.community_cards:
-            community_vals.append(card_values[card.rank])
-            community_vals.append(rank_values[card.suit])
+            community_vals.append(card.value)
+            community_vals.append(card.suit_index)
         while len(community_vals) < 10:
             community_vals.append(0)
 
@@ -467,7 +545,7 @@ class GameLoop:
                 risk_modifier = -0.1
 
         # 20-dim tensor: hole cards, board state, position, dynamics, style
-        return torch.tensor([
+        features = [
             rank1, suit1,
             rank2, suit2,
             *community_vals,
@@ -477,20 +555,40 @@ class GameLoop:
             round_raise_rate,
             avg_opp_aggressiveness,
             risk_modifier
-        ], dtype=torch.float32)
+        ]
+
+        # Optional 21st feature: Monte Carlo win probability against the opponents still in the hand
+        if self.equity_engine:
+            live_opponents = sum(1 for p in self.players if p != player and not p.folded and not p.eliminated)
+            features.append(self.equity_engine.equity(
+                [card.code for card in player.hand],
+                [card.code for card in self.community_cards],
+                live_opponents
+            ))
+
+        # Each bot picks its own state type (a torch tensor for BotWrapper, a numpy array for NumpyBot)
+        return player.bot_instance.make_state(features)
+
+    # Checks whether a bot player is able to make a decision this turn
+    def can_bot_act(self, player):
+        if player.eliminated or player.folded or player.all_in:
+            return False
+        return bool(player.is_bot and player.bot_instance)
 
     # Handles the entire AI turn for a bot player, including action resolution and experience recording.
     def bot_take_action(self, player):
-        if player.eliminated or player.folded or player.all_in:
-            return
-        if not player.is_bot or not player.bot_instance:
+        if not self.can_bot_act(player):
             return
 
         # Generate current state vector and get decision from the bot policy
         state_tensor = self.get_bot_state(player)
         can_check = player.total_bet == self.betting_manager.current_bet
         action = player.bot_instance.decide_action(state_tensor, can_check=can_check)
+        self.apply_bot_action(player, state_tensor, action)
 
+    # Applies an already-chosen bot action to the table and records the experience.
+    # Split out of bot_take_action so batched engines can decide for many tables at once.
+    def apply_bot_action(self, player, state_tensor, action):
         self.recent_actions.append((player.name, action))
         if action not in ["fold", "call", "raise", "check"]:
             return
@@ -528,7 +626,8 @@ class GameLoop:
                 player.checked = True
 
         elif action == "raise":
-            hand_strength = state_tensor[0].item()
+            # Equity in [0, 1] when available, otherwise the first hole card's rank
+            hand_strength = state_tensor[EQUITY_FEATURE].item() if self.equity_engine else state_tensor[0].item()
             proposed_raise = int(player.chips * hand_strength * 0.25)
             proposed_raise = max(self.betting_manager.last_raise_amount, proposed_raise)
             proposed_raise = max(5, round(proposed_raise / 5) * 5)  # round to nearest 5
@@ -593,19 +692,17 @@ class GameLoop:
         player_hands = {}
         for player in self.players:
             if not player.folded and not player.eliminated:
-                rank, tiebreakers = PokerHandEvaluator.evaluate_five_card_hand(player.hand, self.community_cards)
-                player_hands[player.name] = (rank, tiebreakers)
+                player_hands[player.name] = player.hand_state.strength
 
         if not player_hands:
             print("No valid hands. No winner.")
             return None
 
-        # Determine best hand rank and tiebreakers
-        best_hand = max(player_hands.values(), key=lambda x: (x[0], x[1]))
-        best_rank, best_values = best_hand
+        # Determine best hand strength (rank and tiebreakers packed into one int)
+        best_strength = max(player_hands.values())
         tied_players = [
-            name for name, hand in player_hands.items()
-            if hand[0] == best_rank and hand[1] == best_values
+            name for name, strength in player_hands.items()
+            if strength == best_strength
         ]
 
         # Split the pot evenly, then distribute remainder by dealer order
@@ -665,7 +762,7 @@ class GameLoop:
         # Reset betting manager and deck, re-deal
         self.betting_manager = BettingManager(self.players, self.dealer_index)
         self.betting_manager.set_blinds()
-        self.deck = Deck()
+        self.deck.reset()
         self.deal_hole_cards()
 
         self.betting_manager.build_betting_order(self.state)
@@ -682,29 +779,13 @@ class GameLoop:
             round_winner = getattr(self, "round_winner_name", None)
 
             # Log win stats to file
-            round_win_path = "training_logs/round_wins.json"
-            os.makedirs("training_logs", exist_ok=True)
-
-            if os.path.exists(round_win_path):
-                with open(round_win_path, "r") as f:
-                    round_wins = json.load(f)
-            else:
-                round_wins = {"rounds_played": 0}
-
-            round_wins["rounds_played"] += 1
-
-            if round_winner:
-                if round_winner not in round_wins:
-                    round_wins[round_winner] = {"fold": 0, "showdown": 0}
-                round_wins[round_winner][self.win_type] += 1
-
-            with open(round_win_path, "w") as f:
-                json.dump(round_wins, f, indent=2)
+            if not self.play_only:
+                round_wins = self.training_log.record_round(round_winner, self.win_type)
 
             # Imitation Learning: copy winning actions to opponents' imitation buffers
             winner_obj = next((p for p in self.players if p.name == self.round_winner_name), None)
             if winner_obj and winner_obj.is_bot and hasattr(winner_obj.bot_instance, 'agent'):
-                recent_actions = list(winner_obj.bot_instance.agent.sl_buffer.buffer)[-3:]
+                recent_actions = winner_obj.bot_instance.agent.sl_buffer.recent(3)
                 for player in self.players:
                     if player.is_bot and player.name != self.round_winner_name:
                         for (state, action) in recent_actions:
@@ -751,63 +832,93 @@ class GameLoop:
             # Save RL training data to SQLite
             for player in self.players:
                 if player.is_bot:
-                    player.bot_instance.save_experiences_to_sqlite(win_type=self.win_type)
+                    if not self.play_only:
+                        player.bot_instance.save_experiences_to_sqlite(win_type=self.win_type, writer=self.experience_writer)
                     player.bot_instance.results = player.bot_instance.results if hasattr(player.bot_instance, 'results') else []
                     player.bot_instance.results.append(player.chips)
 
-            # Train policies after round
-            for player in self.players:
-                if player.is_bot:
-                    player.bot_instance.train()
+            # Train policies when the scheduler says so (play-only tables leave learning to an external learner)
+            if not self.play_only:
+                self.training_scheduler.hand_finished([p.bot_instance for p in self.players if p.is_bot])
 
             # Update learned player style profiles
             for player in self.players:
                 if player.is_bot:
                     player.bot_instance.update_opponent_profile()
 
-            # Reset for next hand
-            self.reset_round()
-            self._ready_to_reset = False
-            self.win_type = None
-
-            # Check if someone has won the game
-            active_players = [p for p in self.players if not p.eliminated]
-            if len(active_players) == 1:
-                winner = active_players[0].name
-                self.games_won[winner] += 1
+            if not self.play_only:
+                # reset_round eliminates busted players; a round that ends the game goes straight to the restart
+                game_over = len([p for p in self.players if not p.eliminated and p.chips > 0]) == 1
+                if not game_over:
+                    self.log_progress(round_wins)
+                # Snapshot here, between hands, so a resumed run deals the next hand exactly as this one would
+                if self.checkpointer:
+                    self.checkpointer.hand_finished(self, round_wins["rounds_played"])
+
+            self.start_next_hand()
+
+    # Deals the next hand, or restarts the game once a single player has chips left
+    def start_next_hand(self):
+        self.reset_round()
+        self._ready_to_reset = False
+        self.win_type = None
+
+        # Check if someone has won the game
+        active_players = [p for p in self.players if not p.eliminated]
+        if len(active_players) == 1:
+            winner = active_players[0].name
+            self.games_won[winner] += 1
+            if not self.play_only:
                 with open("training_logs/game_wins.json", "w") as f:
                     json.dump(self.games_won, f, indent=2)
-                self.restart_full_game()
-                return
-
-            # Chart win rate stats periodically
-            if round_wins["rounds_played"] == 50 or round_wins["rounds_played"] % 1000 == 0:
-                from bot_learning import plot_round_win_pie, plot_combined_win_pie
-                plot_round_win_pie(save_path=f"training_logs/round_pie_{round_wins['rounds_played']}.png")
-                plot_combined_win_pie(save_path=f"training_logs/combined_pie_{round_wins['rounds_played']}.png")
+            self.restart_full_game()
 
-            # Print and save policy accuracy
-            if round_wins["rounds_played"] % 1 == 0:
-                accuracy_path = "training_logs/accuracy_log.json"
-                os.makedirs("training_logs", exist_ok=True)
-                log_entry = {"round": round_wins["rounds_played"]}
+    # Periodic win-rate charts and policy accuracy measurements
+    def log_progress(self, round_wins):
+        # Chart win rate stats periodically
+        if round_wins["rounds_played"] == 50 or round_wins["rounds_played"] % 1000 == 0:
+            from bot_learning import plot_round_win_pie, plot_combined_win_pie
+            self.training_log.compact()  # The charts read the compacted round_wins.json
+            plot_round_win_pie(save_path=f"training_logs/round_pie_{round_wins['rounds_played']}.png")
+            plot_combined_win_pie(save_path=f"training_logs/combined_pie_{round_wins['rounds_played']}.png")
 
-                for player in self.players:
-                    if player.is_bot:
-                        acc = player.bot_instance.compute_policy_accuracy()
-                        log_entry[player.name] = round(acc, 4)
-                        print(f"[ACCURACY] {player.name} policy accuracy: {acc:.2%}")
-
-                if os.path.exists(accuracy_path):
-                    with open(accuracy_path, "r") as f:
-                        accuracy_data = json.load(f)
-                else:
-                    accuracy_data = []
+        # Print and save policy accuracy
+        if self.accuracy_interval and round_wins["rounds_played"] % self.accuracy_interval == 0:
+            log_entry = {"round": round_wins["rounds_played"]}
 
-                accuracy_data.append(log_entry)
-
-                with open(accuracy_path, "w") as f:
-                    json.dump(accuracy_data, f, indent=2)
+            for player in self.players:
+                if player.is_bot:
+                    acc = player.bot_instance.compute_policy_accuracy(sample_size=self.accuracy_sample_size)
+                    log_entry[player.name] = round(acc, 4)
+                    print(f"[ACCURACY] {player.name} policy accuracy: {acc:.2%}")
+
+            self.training_log.record_accuracy(log_entry)
+
+    # Chip counts and game-level counters between hands (the hand itself is dealt fresh on resume)
+    def table_state(self):
+        return {
+            "players": [{"name": p.name, "chips": p.chips, "eliminated": p.eliminated} for p in self.players],
+            "dealer_index": self.dealer_index,
+            "games_won": dict(self.games_won),
+            "recent_actions": list(self.recent_actions),  # Never cleared, so it feeds every later state
+        }
+
+    def load_table_state(self, state):
+        players = {p.name: p for p in self.players}
+        for saved in state["players"]:
+            player = players[saved["name"]]
+            player.chips = saved["chips"]
+            player.eliminated = saved["eliminated"]
+        self.dealer_index = state["dealer_index"]
+        self.games_won = dict(state["games_won"])
+        self.recent_actions = list(state["recent_actions"])
+
+    # Opened on first use so play-only tables never touch the log files
+    @property
+    def training_log(self):
+        if self._training_log is None:
+            self._training_log = TrainingLog.shared()
+        return self._training_log
 
     # Immediately ends round due to all others folding; sets winner and triggers reset
     def end_round_immediately(self):
@@ -818,15 +929,18 @@ class GameLoop:
         self.state = "end_round"
         self._ready_to_reset = True
 
-    # Resets the entire game state (new bots, chips, deck) once a full game ends
+    # Resets the entire game state (chips, deck, dealer) once a full game ends
     def restart_full_game(self):
+        # The same bots sit down again, keeping their networks, buffers and opponent stats
+        bots = {p.name: p.bot_instance for p in self.players}
         self.players = []
         for name in self.initial_player_names:
-            bot = BotWrapper(name)
+            bot = bots[name]
+            bot.last_state_tensor = None
             self.players.append(Player(name, chips=2500, is_bot=True, bot_instance=bot))
 
         self.dealer_index = 0
-        self.deck = Deck()
+        self.deck.reset()
         self.pot = 0
         self.state = "pre-flop"
         self.community_cards = []
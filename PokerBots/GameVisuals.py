@@ -1,8 +1,11 @@
+import argparse
 import pygame as pg
 import time
 import random
 from GameLogic import GameLoop, BettingManager, Player, hand_ranks, suits, ranks, card_values
 from Bots import BotWrapper
+from experience_writer import ExperienceWriter
+from checkpoint import Checkpointer
 
 pg.init()
 
@@ -12,8 +15,8 @@ Run This Script To Run Project
 
 #Main UI Class for rendering the game using pygame
 class PokerGameUI:
-    #initialised the UI, loads assets, sets up players and game logic
-    def __init__(self):
+    #initialised the UI, loads assets, sets up players and game logic (resume continues from the newest checkpoint)
+    def __init__(self, resume=False):
         self.screen_width = 1536
         self.screen_height = 1024
         self.screen = pg.display.set_mode((self.screen_width, self.screen_height))
@@ -36,10 +39,17 @@ class PokerGameUI:
             Player("conservative", is_bot=True, bot_instance=BotWrapper("conservative", style="conservative")),
             Player("strategist", is_bot=True, bot_instance=BotWrapper("strategist", style="strategist")),
         ]
-        self.game = GameLoop(player_objs=self.bot_players)
+        # Experiences are written to SQLite on a background thread so disk latency doesn't freeze the table
+        self.experience_writer = ExperienceWriter()
+        # The bots' learning state is checkpointed every 100 hands, also written off the UI thread
+        self.checkpointer = Checkpointer(every_hands=100)
+        self.game = GameLoop(player_objs=self.bot_players, experience_writer=self.experience_writer,
+                             checkpointer=self.checkpointer)
         
 
         self.game.deal_hole_cards()
+        if resume:
+            self.checkpointer.restore()
 
         self.hole_card_images = {
             i: [self.card_images[f"{card.rank}_of_{card.suit}"] for card in player.hand]
@@ -221,10 +231,17 @@ class PokerGameUI:
             pg.display.flip()
             self.clock.tick(30)
 
+        self.experience_writer.close()
+        self.checkpointer.close()
+        self.game.training_log.compact()
         pg.quit()
 
 
 if __name__ == "__main__":
-    ui = PokerGameUI()
+    parser = argparse.ArgumentParser(description="Watch the poker bots play.")
+    parser.add_argument("--resume", action="store_true", help="Continue from the newest checkpoint in training_logs/checkpoints")
+    args = parser.parse_args()
+
+    ui = PokerGameUI(resume=args.resume)
     ui.run()
 
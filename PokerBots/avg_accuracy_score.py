@@ -1,6 +1,10 @@
 import json
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from training_log import compact_logs
+
+# Fold the append-only accuracy log into accuracy_log.json first
+compact_logs()
 
 # Load the data
 with open("training_logs/accuracy_log.json", "r") as file:
@@ -0,0 +1,60 @@
+import argparse
+import time
+import torch
+from nfsp_agent import NFSPAgent
+
+"""
+Micro-benchmark of per-decision latency: the nn.Module forward under
+torch.no_grad() that bots used to run, against NFSPAgent's InferenceMLP path.
+
+    python PokerBots/bench_inference.py --decisions 20000
+"""
+
+
+#Average microseconds per call of fn over n calls (after a short warm-up).
+def time_per_call(fn, n):
+    for _ in range(min(n, 500)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run_benchmark(decisions=20000, batch=64, state_size=20):
+    agent = NFSPAgent("bench", state_size, 3, epsilon=0.0)
+    state = torch.randn(state_size)
+    states = torch.randn(batch, state_size)
+
+    def module_single():
+        with torch.no_grad():
+            return agent.q_net(state.unsqueeze(0)).argmax(dim=1).item()
+
+    def module_batch():
+        with torch.no_grad():
+            return agent.q_net(states).argmax(dim=1).tolist()
+
+    # Both paths must agree before their speed means anything
+    assert module_single() == agent.select_action(state)
+    assert module_batch() == agent.select_actions(states)
+
+    return {
+        "single_module_us": time_per_call(module_single, decisions),
+        "single_inference_us": time_per_call(lambda: agent.select_action(state), decisions),
+        "batch_module_us": time_per_call(module_batch, decisions // 10) / batch,
+        "batch_inference_us": time_per_call(lambda: agent.select_actions(states), decisions // 10) / batch,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-decision latency of the bot networks.")
+    parser.add_argument("--decisions", type=int, default=20000, help="Timed calls per measurement")
+    parser.add_argument("--batch", type=int, default=64, help="Rows per batched call")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    results = run_benchmark(decisions=args.decisions, batch=args.batch)
+    print(f"[BENCH] Single decision: {results['single_module_us']:.1f}us module -> {results['single_inference_us']:.1f}us inference path")
+    print(f"[BENCH] Batched ({args.batch}) per decision: {results['batch_module_us']:.2f}us module -> "
+          f"{results['batch_inference_us']:.2f}us inference path")
@@ -0,0 +1,72 @@
+"""
+Torch-free behaviour shared by every bot implementation (Bots.BotWrapper and
+numpy_policy.NumpyBot): turning agent action indices into table actions and
+profiling opponents. Subclasses provide self.agent (with select_action and
+select_actions), opponent_stats, opponent_profiles, make_state and stack_states.
+"""
+
+
+#Exploration rate a bot of this style plays with.
+def style_epsilon(style):
+    if style == "strategist":
+        return 0.05
+    if style == "novice":
+        return 0.3
+    return 0.1
+
+
+class BotBase:
+
+    ACTIONS = ["fold", "call", "raise"]
+
+    #Uses the Q-network to select an action, then maps index to name.
+    def decide_action(self, state_tensor, can_check=False):
+        self.last_state_tensor = state_tensor
+        action_index = self.agent.select_action(state_tensor, use_avg_policy=False)
+        return self.index_to_action(action_index, can_check)
+
+    #Decides for many wrappers sharing the same networks with one batched forward pass.
+    @staticmethod
+    def decide_actions_batched(bots, state_tensors, can_checks):
+        states = bots[0].stack_states(state_tensors)
+        epsilons = [bot.agent.epsilon for bot in bots]
+        indices = bots[0].agent.select_actions(states, epsilons=epsilons)
+        return BotBase.actions_from_indices(bots, state_tensors, indices, can_checks)
+
+    #Records each bot's state and maps its chosen action index to a table action.
+    @staticmethod
+    def actions_from_indices(bots, state_tensors, indices, can_checks):
+        actions = []
+        for bot, state_tensor, index, can_check in zip(bots, state_tensors, indices, can_checks):
+            bot.last_state_tensor = state_tensor
+            actions.append(bot.index_to_action(index, can_check))
+        return actions
+
+    #Maps action index to string label.
+    def index_to_action(self, index, can_check):
+        action = self.ACTIONS[index]
+        if can_check and action == "call":
+            return "check"
+        return action
+
+    def update_opponent_profile(self):
+        """
+        Classifies each opponent into one of 4 profiles based on long-term stats:
+        aggressive, tight, loose, or balanced.
+        """
+        for name, stats in self.opponent_stats.items():
+            rounds = max(1, stats.get("rounds", 1))
+            raise_rate = stats.get("raise", 0) / rounds
+            fold_rate = stats.get("fold", 0) / rounds
+            call_rate = stats.get("call", 0) / rounds
+
+            if raise_rate > 0.4:
+                profile = "aggressive"
+            elif fold_rate > 0.5:
+                profile = "tight"
+            elif call_rate > 0.5 and raise_rate < 0.2:
+                profile = "loose"
+            else:
+                profile = "balanced"
+
+            self.opponent_profiles[name] = profile
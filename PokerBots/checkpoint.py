@@ -0,0 +1,222 @@
+import copy
+import os
+import random
+import shutil
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+
+"""
+Periodic checkpoints of the bots' learning state, and resuming from them.
+
+Every every_hands finished hands GameLoop passes its table to the
+Checkpointer, which snapshots on the game thread (a few milliseconds) each
+bot's networks and optimisers, replay buffers, epsilon and opponent stats,
+the random number generators, the table's chip counts and how far the
+SQLite experience tables and JSON-lines logs had got. A background thread
+then writes it as one torch file per bot plus run.pt into
+training_logs/checkpoints/round_<n>/, built under a temporary name and
+renamed into place so a crash mid-write never leaves a partial checkpoint.
+The newest keep checkpoints are kept.
+
+restore() rewinds the experience tables and logs to the checkpoint and deals
+the next hand from the saved generator state, so a single-table run without
+background training carries on exactly as the original did:
+
+    python PokerBots/simulation.py --hands 10000 --checkpoint-every 500
+    python PokerBots/simulation.py --hands 10000 --checkpoint-every 500 --resume
+
+With several tables only the table that took the checkpoint resumes
+mid-game; the others start a fresh game with the restored bots.
+"""
+
+CHECKPOINT_DIR = "training_logs/checkpoints"
+PREFIX = "round_"
+TMP_SUFFIX = ".tmp"
+
+
+#Complete checkpoint directories, oldest first (ones still being written are skipped).
+def list_checkpoints(directory=CHECKPOINT_DIR):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith(PREFIX) and not name.endswith(TMP_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+#Equity engines in use (StrengthTables keeps its Monte Carlo engine as fallback).
+def _equity_engines(game):
+    engine = game.equity_engine
+    while engine is not None:
+        if hasattr(engine, "rng"):
+            yield engine
+        engine = getattr(engine, "fallback", None)
+
+
+def rng_state(game):
+    """
+    State of every random number generator play draws from, including the
+    equity engines' generators and caches (a cache hit skips a rollout).
+    Returns:
+        dict that load_rng_state accepts.
+    """
+    return {
+        "random": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "equity": [(engine.rng.bit_generator.state, list(engine.cache.items())) for engine in _equity_engines(game)],
+    }
+
+
+def load_rng_state(game, state):
+    random.setstate(state["random"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    for engine, (generator, cache) in zip(_equity_engines(game), state["equity"]):
+        engine.rng.bit_generator.state = generator
+        engine.cache = OrderedDict(cache)
+
+
+class Checkpointer:
+    """
+    Checkpoints every table registered with it (GameLoop(checkpointer=...)
+    registers itself) every every_hands hands, counted across all of them,
+    writing on a background thread. every_hands=0 only restores.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, every_hands=500, keep=3):
+        self.directory = directory
+        self.every_hands = every_hands
+        self.keep = keep
+        self.games = []
+        self.hands_since_save = 0
+        self.saved = 0
+
+        # At most one checkpoint being written at a time
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+
+    def add_game(self, game):
+        self.games.append(game)
+
+    #Each bot name's wrappers across every table, in table order.
+    def _bots_by_name(self):
+        bots = defaultdict(list)
+        for game in self.games:
+            for player in game.players:
+                if player.is_bot:
+                    bots[player.name].append(player.bot_instance)
+        return bots
+
+    def hand_finished(self, game, rounds_played):
+        """
+        Called by GameLoop between hands (before the next one is dealt).
+        Returns:
+            bool: True if a checkpoint was taken.
+        """
+        self.hands_since_save += 1
+        if not self.every_hands or self.hands_since_save < self.every_hands:
+            return False
+        if self.pending is not None:
+            if not self.pending.done():
+                return False  # Previous checkpoint still being written; stay due
+            self.pending.result()  # Surfaces a failed write
+            self.pending = None
+
+        self.hands_since_save = 0
+        run, bot_states = self.snapshot(game, rounds_played)
+        self.pending = self.executor.submit(self._write, run, bot_states)
+        self.saved += 1
+        return True
+
+    def snapshot(self, game, rounds_played):
+        """
+        Copies everything a resume needs; game is the table that has just finished a hand.
+        Returns:
+            (run state, {bot name: {"networks": ..., "seats": [...]}})
+        """
+        scheduler = game.training_scheduler
+        scheduler.wait()  # Applies background updates, so the learner optimisers match the play networks
+
+        bot_states = {}
+        experience_ids = {}
+        for name, seats in self._bots_by_name().items():
+            bot_states[name] = {
+                "networks": scheduler.training_agent(seats[0].agent).network_state(),
+                "seats": [bot.state_dict() for bot in seats],
+            }
+            experience_ids[name] = seats[0].last_experience_id()
+
+        run = {
+            "rounds_played": rounds_played,
+            "table_index": self.games.index(game),
+            "table": game.table_state(),
+            "round_wins": copy.deepcopy(game.training_log.round_wins),
+            "experience_ids": experience_ids,
+            "scheduler": scheduler.state_dict(),
+            "rng": rng_state(game),
+        }
+        return run, bot_states
+
+    #Writes one checkpoint directory atomically and drops the oldest beyond keep.
+    def _write(self, run, bot_states):
+        path = os.path.join(self.directory, f"{PREFIX}{run['rounds_played']:08d}")
+        tmp_path = path + TMP_SUFFIX
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, state in bot_states.items():
+            torch.save(state, os.path.join(tmp_path, f"{name}.pt"))
+        torch.save(run, os.path.join(tmp_path, "run.pt"))
+
+        if os.path.exists(path):
+            shutil.rmtree(path)  # The same round checkpointed again after a resume
+        os.replace(tmp_path, path)
+        for old in list_checkpoints(self.directory)[:-self.keep]:
+            shutil.rmtree(old)
+        print(f"[CHECKPOINT] Saved round {run['rounds_played']} to {path}")
+        return path
+
+    def restore(self, path=None):
+        """
+        Loads a checkpoint (by default the newest in directory) into the registered
+        tables, rewinds the experience tables and logs to it and deals the next
+        hand at the table it was taken on.
+        Returns:
+            int: the round the checkpoint was taken after (0 if there was none).
+        """
+        if path is None:
+            checkpoints = list_checkpoints(self.directory)
+            if not checkpoints:
+                print(f"[CHECKPOINT] No checkpoint in {self.directory}; starting fresh")
+                return 0
+            path = checkpoints[-1]
+        run = torch.load(os.path.join(path, "run.pt"), weights_only=False)
+
+        for name, seats in self._bots_by_name().items():
+            state = torch.load(os.path.join(path, f"{name}.pt"), weights_only=False)
+            seats[0].agent.load_network_state(state["networks"])  # Every seat of a bot shares these
+            if len(state["seats"]) != len(seats):
+                print(f"[CHECKPOINT] {name} has {len(state['seats'])} saved seats and {len(seats)} in this run; "
+                      f"restoring the first {min(len(seats), len(state['seats']))}")
+            for bot, seat in zip(seats, state["seats"]):
+                bot.load_state_dict(seat)
+            seats[0].truncate_experiences(run["experience_ids"][name])
+
+        game = self.games[min(run["table_index"], len(self.games) - 1)]
+        game.training_log.rewind(run["round_wins"])
+        game.training_scheduler.load_state_dict(run["scheduler"])
+        game.load_table_state(run["table"])
+        load_rng_state(game, run["rng"])
+        game.start_next_hand()
+        print(f"[CHECKPOINT] Resumed from round {run['rounds_played']} ({path})")
+        return run["rounds_played"]
+
+    #Waits for the checkpoint being written, if any (raising its error if it failed).
+    def wait(self):
+        if self.pending is not None:
+            self.pending.result()
+            self.pending = None
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
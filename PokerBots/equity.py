@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import numpy as np
+from hand_evaluator import evaluate_batch
+
+"""
+Monte Carlo equity estimates for the bots' hand-strength signal.
+
+Rollouts are dealt and scored for all samples at once with
+hand_evaluator.evaluate_batch, and results are kept in an LRU cache keyed on
+the suit-canonicalised (hole, board, opponents) spot, so repeated and
+suit-isomorphic spots cost nothing after the first lookup.
+"""
+
+
+#Relabels suits in order of first appearance so suit-isomorphic spots share a key.
+def canonical_spot(hole, board, num_opponents):
+    hole = sorted(hole)
+    board = sorted(board)
+    suit_map = {}
+    for card in hole + board:
+        suit_map.setdefault(card & 3, len(suit_map))
+
+    def relabel(cards):
+        return tuple(sorted((card & ~3) | suit_map[card & 3] for card in cards))
+
+    return relabel(hole), relabel(board), num_opponents
+
+
+class EquityEngine:
+    """
+    Estimates the probability that a hand wins at showdown against
+    num_opponents random hands, given the board so far (ties split the pot).
+    """
+
+    def __init__(self, samples=256, cache_size=50000, seed=None):
+        self.samples = samples
+        self.cache_size = cache_size
+        self.rng = np.random.default_rng(seed)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def equity(self, hole, board, num_opponents):
+        """
+        hole and board are int cards (see hand_evaluator.card_index).
+        Returns:
+            float in [0, 1]
+        """
+        num_opponents = max(1, num_opponents)
+        key = canonical_spot(hole, board, num_opponents)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        value = self.rollout(key[0], key[1], num_opponents)
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)  # Evict least recently used
+        return value
+
+    #Plays out all samples in one vectorised pass.
+    def rollout(self, hole, board, num_opponents):
+        share, _full_board = showdown_shares(hole, board, num_opponents, self.samples, self.rng)
+        return float(share.mean())
+
+
+def showdown_shares(hole, board, num_opponents, samples, rng):
+    """
+    Deals samples random completions of the board plus opponent hole cards and
+    scores them all with evaluate_batch.
+    Returns:
+        ([samples] pot share won by hole, [samples, 5] completed boards)
+    """
+    used = set(hole) | set(board)
+    remaining = np.array([card for card in range(52) if card not in used], dtype=np.int64)
+    board_needed = 5 - len(board)
+    drawn_needed = board_needed + 2 * num_opponents
+
+    # Each row is an independent shuffle of the unseen cards
+    shuffled = rng.permuted(np.tile(remaining, (samples, 1)), axis=1)[:, :drawn_needed]
+    known_board = np.tile(np.array(board, dtype=np.int64).reshape(1, -1), (samples, 1))
+    full_board = np.concatenate([known_board, shuffled[:, :board_needed]], axis=1)
+
+    hero_cards = np.concatenate([np.tile(np.array(hole, dtype=np.int64), (samples, 1)), full_board], axis=1)
+    hero = evaluate_batch(hero_cards)
+
+    opponent_holes = shuffled[:, board_needed:].reshape(samples, num_opponents, 2)
+    opponent_cards = np.concatenate(
+        [opponent_holes, np.repeat(full_board[:, None, :], num_opponents, axis=1)], axis=2
+    ).reshape(samples * num_opponents, 7)
+    opponents = evaluate_batch(opponent_cards).reshape(samples, num_opponents)
+
+    best_opponent = opponents.max(axis=1)
+    ties = (opponents == hero[:, None]).sum(axis=1)
+    share = np.where(hero > best_opponent, 1.0, np.where(hero == best_opponent, 1.0 / (ties + 1), 0.0))
+    return share, full_board
@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+
+"""
+Background persistence for bot experiences.
+
+BotWrapper.save_experiences_to_sqlite encodes the new transitions on the
+game thread and, when given an ExperienceWriter, hands the rows to it
+instead of writing them inline, so SQLite commit/fsync latency no longer
+stalls the game loop (or the pygame UI). The queue is bounded: when the
+writer falls behind, submit blocks until there is room again.
+"""
+
+
+class ExperienceWriter:
+    """
+    Persists (bot, rows) batches on a dedicated daemon thread and keeps
+    counters for queue depth and write latency.
+    """
+
+    def __init__(self, max_pending=64):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.batches_written = 0
+        self.rows_written = 0
+        self.max_depth = 0
+        self.blocked_submits = 0  # Times submit had to wait for room (backpressure)
+        self.total_write_time = 0.0
+        self.max_write_time = 0.0
+        self.errors = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="experience-writer", daemon=True)
+        self.thread.start()
+
+    #Queues one encoded batch for bot; blocks while the queue is full.
+    def submit(self, bot, rows):
+        if self.closed:
+            raise RuntimeError("ExperienceWriter is closed")
+        if self.queue.full():
+            self.blocked_submits += 1
+        self.queue.put((bot, rows))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                bot, rows = item
+                start = time.perf_counter()
+                bot.write_experience_rows(rows)
+                elapsed = time.perf_counter() - start
+                self.batches_written += 1
+                self.rows_written += len(rows)
+                self.total_write_time += elapsed
+                self.max_write_time = max(self.max_write_time, elapsed)
+            except Exception as e:
+                self.errors += 1
+                print(f"[WRITER] Failed to store experiences: {e}")
+            finally:
+                self.queue.task_done()
+
+    #Blocks until every batch submitted so far is on disk.
+    def flush(self):
+        self.queue.join()
+
+    #Flushes the queue and stops the thread.
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "blocked_submits": self.blocked_submits,
+            "batches_written": self.batches_written,
+            "rows_written": self.rows_written,
+            "avg_write_ms": 1000 * self.total_write_time / max(1, self.batches_written),
+            "max_write_ms": 1000 * self.max_write_time,
+            "errors": self.errors,
+        }
@@ -0,0 +1,286 @@
+import random
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from bot_base import BotBase
+
+"""
+Evaluates and trains several agents' networks as one stacked model.
+
+GroupedMLP stacks the Linear layers of A same-shaped SimpleMLPs into
+[A, out, in] weights and runs them all with one baddbmm per layer.
+GroupedNetworks does this for the Q-networks and the policy networks of a
+set of NFSPAgents, then points each agent's parameters and Adam state at
+its slice of the stacked tensors. The agents keep independent weights, and
+their modules, state_dicts, exported policies and checkpoints work as
+before, but one grouped optimiser step updates all of them, and
+MultiTableEngine chooses actions for every bot with a single forward pass:
+
+    python PokerBots/simulation.py --hands 10000 --tables 64 --grouped
+
+Agents must be grouped after their state is final for the run (e.g. after
+a checkpoint restore): loading an optimiser state_dict replaces the linked
+tensors.
+"""
+
+
+class GroupedMLP(nn.Module):
+    """
+    SimpleMLPs evaluated together: [A, B, in] inputs give [A, B, out] outputs.
+    The given modules' parameters become views of the stacked ones.
+    """
+
+    def __init__(self, modules):
+        super().__init__()
+        layers = [[layer for layer in module.modules() if isinstance(layer, nn.Linear)] for module in modules]
+        shapes = {tuple(layer.weight.shape for layer in module_layers) for module_layers in layers}
+        if len(shapes) != 1:
+            raise ValueError(f"Only identically shaped networks can be grouped, got {sorted(shapes)}")
+
+        self.weights = nn.ParameterList()
+        self.biases = nn.ParameterList()
+        self.slices = []  # (stacked parameter, the modules' parameters viewing its slices)
+        for depth in range(len(layers[0])):
+            for name, stacked_list in (("weight", self.weights), ("bias", self.biases)):
+                params = [getattr(module_layers[depth], name) for module_layers in layers]
+                stacked = nn.Parameter(torch.stack([param.detach() for param in params]))
+                for i, param in enumerate(params):
+                    param.data = stacked.detach()[i]
+                stacked_list.append(stacked)
+                self.slices.append((stacked, params))
+
+        # Contiguous [A, in, out] / [A, 1, out] copies for inference, refreshed when the version counters move
+        self.params = list(self.parameters())
+        self.version = None
+        self.inference_layers = []
+
+    #agents optionally selects (by index) which networks the [len(agents), B, in] input is for.
+    def forward(self, x, agents=None):
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            if agents is not None:
+                weight, bias = weight[agents], bias[agents]
+            x = torch.baddbmm(bias.unsqueeze(1), x, weight.transpose(1, 2))
+            if i < last:
+                x = x.relu()
+        return x
+
+    #forward without autograd, on cached contiguous weights (like nfsp_agent.InferenceMLP).
+    def infer(self, x):
+        version = [param._version for param in self.params]
+        if version != self.version:
+            with torch.no_grad():
+                self.inference_layers = [
+                    (weight.detach().transpose(1, 2).contiguous(), bias.detach().unsqueeze(1).clone())
+                    for weight, bias in zip(self.weights, self.biases)
+                ]
+            self.version = version
+        last = len(self.inference_layers) - 1
+        with torch.inference_mode():
+            for i, (weight_t, bias) in enumerate(self.inference_layers):
+                x = torch.baddbmm(bias, x, weight_t)
+                if i < last:
+                    x = x.relu_()
+        return x
+
+
+class GroupedAdam:
+    """
+    torch.optim.Adam (default betas/eps, no weight decay) over a GroupedMLP
+    with a step count per agent, so an update can leave out agents exactly
+    as if their own optimisers had not been stepped. Starts from, and then
+    shares its state with, the agents' own Adam optimisers.
+    """
+
+    def __init__(self, grouped, agent_optimisers):
+        settings = agent_optimisers[0].param_groups[0]
+        self.lr = settings["lr"]
+        self.betas = settings["betas"]
+        self.eps = settings["eps"]
+        self.params = [stacked for stacked, _params in grouped.slices]
+        self.state = {}
+
+        for stacked, params in grouped.slices:
+            states = [agent_optimiser.state.get(param, {}) for agent_optimiser, param in zip(agent_optimisers, params)]
+            shared = self.state[stacked] = {
+                "step": torch.tensor([float(state.get("step", 0.0)) for state in states], dtype=torch.float32),
+                "exp_avg": torch.stack([state.get("exp_avg", torch.zeros_like(param)) for state, param in zip(states, params)]),
+                "exp_avg_sq": torch.stack([state.get("exp_avg_sq", torch.zeros_like(param)) for state, param in zip(states, params)]),
+            }
+            # The agents' optimisers see their slices, so their state_dicts (checkpoints) stay current
+            for i, (agent_optimiser, param) in enumerate(zip(agent_optimisers, params)):
+                agent_optimiser.state[param] = {name: value[i] for name, value in shared.items()}
+
+    def zero_grad(self):
+        for param in self.params:
+            param.grad = None
+
+    #One Adam update of the agents with the given indices (all of them by default).
+    def step(self, agents=None):
+        beta1, beta2 = self.betas
+        rows = slice(None) if agents is None else agents
+        with torch.no_grad():
+            for param in self.params:
+                if param.grad is None:
+                    continue
+                state = self.state[param]
+                grad = param.grad[rows]
+                state["step"][rows] += 1
+                step = state["step"][rows].view(-1, *[1] * (param.dim() - 1))
+
+                # Indexing with a tensor copies, so those rows are written back
+                exp_avg = state["exp_avg"][rows].lerp_(grad, 1 - beta1)
+                exp_avg_sq = state["exp_avg_sq"][rows].mul_(beta2).addcmul_(grad, grad, value=1 - beta2)
+                if agents is not None:
+                    state["exp_avg"][rows] = exp_avg
+                    state["exp_avg_sq"][rows] = exp_avg_sq
+
+                denom = (exp_avg_sq.sqrt() / (1 - beta2 ** step).sqrt()).add_(self.eps)
+                param[rows] -= exp_avg / denom * (self.lr / (1 - beta1 ** step))
+
+
+class GroupedNetworks:
+    """
+    Stacked q_net/policy_net (and GroupedAdam optimisers) over a fixed list
+    of NFSPAgents with distinct networks, e.g. the four default bots.
+    """
+
+    def __init__(self, agents):
+        self.agents = list(agents)
+        self.index = {agent.q_net: i for i, agent in enumerate(self.agents)}
+        if len(self.index) != len(self.agents):
+            raise ValueError("Grouped agents must not share networks")
+        self.state_size = self.agents[0].state_size
+
+        self.q_net = GroupedMLP([agent.q_net for agent in self.agents])
+        self.policy_net = GroupedMLP([agent.policy_net for agent in self.agents])
+        self.q_optimiser = GroupedAdam(self.q_net, [agent.q_optimiser for agent in self.agents])
+        self.policy_optimiser = GroupedAdam(self.policy_net, [agent.policy_optimiser for agent in self.agents])
+
+    #Whether bots hold exactly one wrapper per grouped agent.
+    def covers(self, bots):
+        return sorted(self.index.get(bot.agent.q_net, -1) for bot in bots) == list(range(len(self.agents)))
+
+    #The agents' InferenceMLP copies can't see updates made through the stacked tensors; force a refresh.
+    def _invalidate_inference(self):
+        for agent in self.agents:
+            agent.q_infer.version = None
+            agent.policy_infer.version = None
+
+    def select_actions(self, agents, state_batches, epsilon_batches):
+        """
+        NFSPAgent.select_actions for several grouped agents in one forward pass.
+        state_batches[k] is an [N_k, state_size] tensor for agents[k]; shorter batches are zero-padded.
+        Returns:
+            list of action index lists, one per agent.
+        """
+        rows = max(len(states) for states in state_batches)
+        stacked = torch.zeros(len(self.agents), rows, self.state_size)
+        for agent, states in zip(agents, state_batches):
+            stacked[self.index[agent.q_net], :len(states)] = states
+        best = self.q_net.infer(stacked).argmax(dim=2).tolist()
+
+        actions = []
+        for agent, states, epsilons in zip(agents, state_batches, epsilon_batches):
+            chosen = best[self.index[agent.q_net]][:len(states)]
+            for i, eps in enumerate(epsilons):
+                if random.random() < eps:
+                    chosen[i] = random.randint(0, agent.action_size - 1)
+            actions.append(chosen)
+        return actions
+
+    def decide_actions_batched(self, bot_groups, state_groups, can_check_groups):
+        """
+        BotBase.decide_actions_batched for several groups of wrappers at once
+        (each group's wrappers share one grouped agent's networks).
+        Returns:
+            list of action lists, one per group.
+        """
+        indices = self.select_actions(
+            [bots[0].agent for bots in bot_groups],
+            [bots[0].stack_states(states) for bots, states in zip(bot_groups, state_groups)],
+            [[bot.agent.epsilon for bot in bots] for bots in bot_groups],
+        )
+        return [
+            BotBase.actions_from_indices(bots, states, chosen, can_checks)
+            for bots, states, chosen, can_checks in zip(bot_groups, state_groups, indices, can_check_groups)
+        ]
+
+    #Indices of the batches holding a full batch_size rows (None when all do), and those batches column-stacked.
+    @staticmethod
+    def _stack_ready(batches, batch_size):
+        ready = [k for k, batch in enumerate(batches) if len(batch[1]) >= batch_size]
+        columns = [torch.stack(column) for column in zip(*(batches[k] for k in ready))]
+        return (None if len(ready) == len(batches) else torch.tensor(ready, dtype=torch.long)), ready, columns
+
+    def train_rl(self, bots, batch_size=32, gamma=0.99):
+        """
+        NFSPAgent.train_rl for every bot (sorted in group order) with one
+        stacked forward/backward pass and optimiser step. The loss is the sum
+        of the agents' own losses, so each gets exactly its own gradient, and
+        agents without a full batch are left out as train_rl would skip them.
+        Returns:
+            int: number of agents updated.
+        """
+        batches, samples = [], []
+        for bot in bots:
+            buffer = bot.agent.rl_buffer
+            if bot.agent.prioritized_replay:
+                batch, indices, weights = buffer.sample_prioritized(batch_size)
+            else:
+                batch = buffer.sample(batch_size)
+                indices, weights = None, torch.ones(len(batch[1]))
+            batches.append(batch)
+            samples.append((buffer, indices, weights))
+        agents, ready, columns = self._stack_ready(batches, batch_size)
+        if not ready:
+            return 0
+        states, actions, rewards, next_states, dones = columns
+        weights = torch.stack([samples[k][2] for k in ready])
+
+        q_values = self.q_net(states, agents).gather(2, actions.unsqueeze(2)).squeeze(2)
+        next_q_values = self.q_net(next_states, agents).max(2)[0].detach()
+        targets = rewards + gamma * next_q_values * (1 - dones)
+        td_errors = targets - q_values
+        loss = (weights * td_errors.pow(2)).mean(dim=1).sum()
+
+        for row, k in enumerate(ready):
+            buffer, indices, _weights = samples[k]
+            if indices is not None:
+                buffer.update_priorities(indices, td_errors[row].detach().numpy())
+        self.q_optimiser.zero_grad()
+        loss.backward()
+        self.q_optimiser.step(agents)
+        self._invalidate_inference()
+        return len(ready)
+
+    #NFSPAgent.train_policy for every bot in one stacked step (agents without a full batch are left out).
+    def train_policy(self, bots, batch_size=32):
+        agents, ready, columns = self._stack_ready([bot.agent.sl_buffer.sample(batch_size) for bot in bots], batch_size)
+        if not ready:
+            print("[TRAIN_POLICY] Skipped — not enough samples.")
+            return 0
+        states, actions = columns
+
+        logits = self.policy_net(states, agents)
+        losses = F.cross_entropy(logits.flatten(0, 1), actions.flatten(), reduction="none").view(actions.shape)
+        loss = losses.mean(dim=1).sum()
+
+        self.policy_optimiser.zero_grad()
+        loss.backward()
+        self.policy_optimiser.step(agents)
+        self._invalidate_inference()
+        print(f"[TRAIN_POLICY] Trained {len(ready)} grouped policies with mean loss: {loss.item() / len(ready):.4f}")
+        return len(ready)
+
+    def train(self, bots, batch_size=32, gamma=0.99, steps=1):
+        """
+        BotWrapper.train for one wrapper per grouped agent (see covers): syncs
+        each RL buffer with SQLite, then takes steps stacked steps per network.
+        """
+        bots = sorted(bots, key=lambda bot: self.index[bot.agent.q_net])
+        new_rows = sum(bot.sync_replay_buffer() for bot in bots)
+        for _ in range(steps):
+            self.train_rl(bots, batch_size, gamma)
+            self.train_policy(bots, batch_size)
+        print(f"[TRAIN] Grouped update of {len(bots)} bots ({new_rows} new rows, {steps} steps).")
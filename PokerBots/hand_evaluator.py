@@ -0,0 +1,250 @@
+"""
+Direct 5-7 card hand evaluator.
+
+Cards are integers 0-51 laid out as (value - 2) * 4 + suit_index, where
+value is 2..14 (Ace high) and suit_index follows GameLogic.rank_values
+(Spades 0, Hearts 1, Clubs 2, Diamonds 3). A hand is reduced in one pass to
+four 13-bit suit masks plus per-rank counts, and the best hand is read from
+lookup tables instead of scoring all 21 five-card combinations.
+
+The result is a single integer that orders hands exactly like the
+(rank, tiebreakers) tuples from PokerHandEvaluator.evaluate_five_card_hand:
+the hand category sits above 20 bits of tiebreak values packed as 4-bit
+nibbles, highest first.
+
+evaluate_batch ranks many hands at once with vectorised NumPy operations and
+returns the same integers as evaluate_cards.
+"""
+import numpy as np
+
+NUM_RANKS = 13
+CATEGORY_SHIFT = 20
+
+# Number of tiebreak values evaluate_five_card_hand returns per hand category
+TIEBREAK_LENGTHS = {0: 5, 1: 4, 2: 3, 3: 3, 4: 1, 5: 5, 6: 2, 7: 2, 8: 1, 9: 1}
+
+
+#Encodes a card value (2-14) and suit index (0-3) as an int 0-51.
+def card_index(value, suit_index):
+    return (value - 2) * 4 + suit_index
+
+
+#Packs (category, tiebreakers) into one comparable integer.
+def pack_strength(category, tiebreakers):
+    packed = 0
+    for i, value in enumerate(tiebreakers):
+        packed |= value << (4 * (4 - i))
+    return (category << CATEGORY_SHIFT) | packed
+
+
+#Unpacks a strength back into the (category, tiebreakers) form.
+def unpack_strength(strength):
+    if strength == 0:
+        return (0, [])
+    category = strength >> CATEGORY_SHIFT
+    length = TIEBREAK_LENGTHS[category]
+    tiebreakers = [(strength >> (4 * (4 - i))) & 0xF for i in range(length)]
+    return (category, tiebreakers)
+
+
+def _build_tables():
+    straight_high = [0] * (1 << NUM_RANKS)
+    top_values = [()] * (1 << NUM_RANKS)
+
+    # Straight windows, best first; bit i is value i + 2, so A-5 is bits 12,0,1,2,3
+    windows = [(0b11111 << (high - 6), high) for high in range(14, 5, -1)]
+    windows.append(((1 << 12) | 0b1111, 5))
+
+    for mask in range(1 << NUM_RANKS):
+        for window, high in windows:
+            if mask & window == window:
+                straight_high[mask] = high
+                break
+        top_values[mask] = tuple(r + 2 for r in range(NUM_RANKS - 1, -1, -1) if mask >> r & 1)
+
+    return straight_high, top_values
+
+
+# STRAIGHT_HIGH[mask]: high card of the best straight within a rank mask (0 if none)
+# TOP_VALUES[mask]: card values present in a rank mask, highest first
+STRAIGHT_HIGH, TOP_VALUES = _build_tables()
+
+# Array forms for evaluate_batch; TOP_PACKED[k][mask] is the top k values of a
+# rank mask already packed into the leading k tiebreak nibbles
+STRAIGHT_HIGH_ARRAY = np.array(STRAIGHT_HIGH, dtype=np.int64)
+TOP_PACKED = np.zeros((6, 1 << NUM_RANKS), dtype=np.int64)
+for _k in range(1, 6):
+    TOP_PACKED[_k] = [pack_strength(0, values[:_k]) for values in TOP_VALUES]
+
+
+def evaluate_cards(cards):
+    """
+    Evaluates the best hand from 5-7 int cards.
+    Returns:
+        int strength; larger is better, equal means a split pot.
+        0 if fewer than 5 cards are given.
+    """
+    if len(cards) < 5:
+        return 0
+
+    suit_masks = [0, 0, 0, 0]
+    counts = [0] * NUM_RANKS
+    for card in cards:
+        rank = card >> 2
+        suit_masks[card & 3] |= 1 << rank
+        counts[rank] += 1
+    return best_hand(suit_masks, counts)
+
+
+def best_hand(suit_masks, counts):
+    """
+    Strength of the best hand described by per-suit rank masks and per-rank counts.
+    With fewer than 5 cards this scores the partial hand (e.g. a pocket pair as One Pair).
+    """
+    # A flush rules out quads and full houses with at most 7 cards
+    for mask in suit_masks:
+        if bin(mask).count("1") >= 5:
+            high = STRAIGHT_HIGH[mask]
+            if high == 14:
+                return pack_strength(9, [14])
+            if high:
+                return pack_strength(8, [high])
+            return pack_strength(5, TOP_VALUES[mask][:5])
+
+    rank_mask = suit_masks[0] | suit_masks[1] | suit_masks[2] | suit_masks[3]
+
+    quads = trips = pairs = None
+    for rank in range(NUM_RANKS - 1, -1, -1):
+        count = counts[rank]
+        if count == 4:
+            quads = rank
+        elif count == 3:
+            trips = [rank] if trips is None else trips + [rank]
+        elif count == 2:
+            pairs = [rank] if pairs is None else pairs + [rank]
+
+    if quads is not None:
+        kicker = TOP_VALUES[rank_mask & ~(1 << quads)][:1]
+        return pack_strength(7, (quads + 2,) + kicker)
+
+    if trips is not None:
+        if len(trips) > 1 or pairs is not None:
+            pair = max(trips[1] if len(trips) > 1 else -1, pairs[0] if pairs else -1)
+            return pack_strength(6, [trips[0] + 2, pair + 2])
+
+    high = STRAIGHT_HIGH[rank_mask]
+    if high:
+        return pack_strength(4, [high])
+
+    if trips is not None:
+        kickers = TOP_VALUES[rank_mask & ~(1 << trips[0])][:2]
+        return pack_strength(3, (trips[0] + 2,) + kickers)
+
+    if pairs is not None:
+        if len(pairs) > 1:
+            high_pair, low_pair = pairs[0], pairs[1]
+            kicker = TOP_VALUES[rank_mask & ~(1 << high_pair) & ~(1 << low_pair)][:1]
+            return pack_strength(2, (high_pair + 2, low_pair + 2) + kicker)
+        kickers = TOP_VALUES[rank_mask & ~(1 << pairs[0])][:3]
+        return pack_strength(1, (pairs[0] + 2,) + kickers)
+
+    return pack_strength(0, TOP_VALUES[rank_mask][:5])
+
+
+class HandState:
+    """
+    A player's cards kept as suit masks and rank counts, updated as the board
+    grows, so the current best-hand strength is always available in O(1).
+    """
+
+    __slots__ = ("suit_masks", "counts", "num_cards", "strength")
+
+    def __init__(self, cards=()):
+        self.suit_masks = [0, 0, 0, 0]
+        self.counts = [0] * NUM_RANKS
+        self.num_cards = 0
+        self.strength = 0
+        self.add_cards(cards)
+
+    #Folds new int cards into the state and re-scores it once.
+    def add_cards(self, cards):
+        for card in cards:
+            rank = card >> 2
+            self.suit_masks[card & 3] |= 1 << rank
+            self.counts[rank] += 1
+            self.num_cards += 1
+        self.strength = best_hand(self.suit_masks, self.counts) if self.num_cards else 0
+
+    @property
+    def category(self):
+        return self.strength >> CATEGORY_SHIFT
+
+
+#Highest rank index in each rank mask (-1 for an empty mask).
+HIGH_RANK_ARRAY = np.array([mask.bit_length() - 1 for mask in range(1 << NUM_RANKS)], dtype=np.int64)
+RANK_BITS = np.int64(1) << np.arange(NUM_RANKS, dtype=np.int64)
+
+
+#Clears the bit for rank (ignoring rows where rank is -1).
+def _without(mask, rank):
+    return np.where(rank >= 0, mask & ~(np.int64(1) << np.maximum(rank, 0)), mask)
+
+
+def evaluate_batch(cards):
+    """
+    Vectorised evaluate_cards for an [N, K] integer array of cards (5 <= K <= 7).
+    Returns:
+        [N] int64 array of hand strengths, identical to evaluate_cards per row.
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2 or cards.shape[1] < 5:
+        return np.zeros(len(cards), dtype=np.int64)
+
+    n = len(cards)
+    row_ids = np.arange(n, dtype=np.int64)[:, None]
+    ranks = cards >> 2
+    bits = np.int64(1) << ranks
+
+    # Rank histogram and per-suit rank masks (cards are distinct, so summing bits is an OR)
+    counts = np.bincount((row_ids * NUM_RANKS + ranks).ravel(), minlength=n * NUM_RANKS).reshape(n, NUM_RANKS)
+    suit_slots = (row_ids * 4 + (cards & 3)).ravel()
+    suit_masks = np.bincount(suit_slots, weights=bits.ravel(), minlength=n * 4).astype(np.int64).reshape(n, 4)
+    suit_counts = np.bincount(suit_slots, minlength=n * 4).reshape(n, 4)
+
+    # Rank masks by multiplicity, so "highest pair" etc. become table lookups
+    rank_mask = (counts > 0) @ RANK_BITS
+    pair_mask = (counts == 2) @ RANK_BITS
+    trips_mask = (counts == 3) @ RANK_BITS
+    quads = HIGH_RANK_ARRAY[(counts == 4) @ RANK_BITS]
+    trips = HIGH_RANK_ARRAY[trips_mask]
+    second_trips = HIGH_RANK_ARRAY[_without(trips_mask, trips)]
+    pair = HIGH_RANK_ARRAY[pair_mask]
+    second_pair = HIGH_RANK_ARRAY[_without(pair_mask, pair)]
+    full_house_pair = np.maximum(second_trips, pair)
+
+    rows = row_ids[:, 0]
+    flush_suit = suit_counts.argmax(axis=1)
+    has_flush = suit_counts[rows, flush_suit] >= 5
+    flush_mask = np.where(has_flush, suit_masks[rows, flush_suit], 0)
+    flush_straight = STRAIGHT_HIGH_ARRAY[flush_mask]
+    straight = STRAIGHT_HIGH_ARRAY[rank_mask]
+
+    def lead(category, *values):
+        strength = np.full(n, category << CATEGORY_SHIFT, dtype=np.int64)
+        for i, value in enumerate(values):
+            strength |= (value + 2) << (4 * (4 - i))
+        return strength
+
+    choices = [
+        (has_flush & (flush_straight == 14), lead(9, np.full(n, 12))),
+        (has_flush & (flush_straight > 0), lead(8, flush_straight - 2)),
+        (quads >= 0, lead(7, quads) | (TOP_PACKED[1][_without(rank_mask, quads)] >> 4)),
+        ((trips >= 0) & (full_house_pair >= 0), lead(6, trips, full_house_pair)),
+        (has_flush, lead(5) | TOP_PACKED[5][flush_mask]),
+        (straight > 0, lead(4, straight - 2)),
+        (trips >= 0, lead(3, trips) | (TOP_PACKED[2][_without(rank_mask, trips)] >> 4)),
+        (second_pair >= 0, lead(2, pair, second_pair) | (TOP_PACKED[1][_without(_without(rank_mask, pair), second_pair)] >> 8)),
+        (pair >= 0, lead(1, pair) | (TOP_PACKED[3][_without(rank_mask, pair)] >> 4)),
+    ]
+    conditions, strengths = zip(*choices)
+    return np.select(conditions, strengths, default=TOP_PACKED[5][rank_mask])
@@ -1,8 +1,9 @@
+import copy
 import torch 
 import torch.nn as nn
 import torch.optim as optim
 import random
-from Experience import ReplayBuffer
+from Experience import ReplayBuffer, ReservoirBuffer, PrioritizedReplayBuffer
 
 """
 Run The GameVisuals Script To Run Project
@@ -24,6 +25,56 @@ class SimpleMLP(nn.Module):
     def forward(self, x):
         return self.net(x)
     
+class InferenceMLP:
+    """
+    Fast forward-only view of a SimpleMLP for choosing actions.
+    Keeps contiguous copies of the weights and runs the layers as fused
+    addmv/addmm calls under inference_mode, skipping nn.Module dispatch and
+    autograd bookkeeping. The copies are refreshed whenever the parameters'
+    version counters show an in-place update (optimiser step, load_state_dict),
+    so training code never has to invalidate it.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.params = list(module.parameters())
+        self.version = None
+        self.layers = []
+
+    def refresh(self):
+        version = [p._version for p in self.params]
+        if version == self.version:
+            return
+        with torch.no_grad():
+            self.layers = [
+                (layer.weight.detach().clone().contiguous(), layer.weight.detach().t().contiguous(), layer.bias.detach().clone())
+                for layer in self.module.modules() if isinstance(layer, nn.Linear)
+            ]
+        self.version = version
+
+    #Outputs for one [input_size] state or an [N, input_size] batch.
+    def __call__(self, x):
+        self.refresh()
+        last = len(self.layers) - 1
+        with torch.inference_mode():
+            for i, (weight, weight_t, bias) in enumerate(self.layers):
+                x = torch.addmv(bias, weight, x) if x.dim() == 1 else torch.addmm(bias, x, weight_t)
+                if i < last:
+                    x = x.relu_()
+        return x
+
+
+#Deep copy in which every tensor gets its own storage (a view must not drag its base tensor along).
+def _compact_copy(value):
+    if torch.is_tensor(value):
+        return value.detach().clone()
+    if isinstance(value, dict):
+        return {key: _compact_copy(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_compact_copy(item) for item in value)
+    return copy.deepcopy(value)
+
+
 class NFSPAgent:
     """
     Implements a Neural Fictitious Self-Play (NFSP) agent with:
@@ -31,23 +82,39 @@ class NFSPAgent:
     - Supervised learning (SL) to imitate average strategies
     - Experience replay for both RL and SL
     """
-    def __init__(self, name, state_size, action_size, rl_buffer_size=50000, sl_buffer_size=50000, epsilon=0.1):
+    def __init__(self, name, state_size, action_size, rl_buffer_size=50000, sl_buffer_size=50000, epsilon=0.1, shared_networks=None,
+                 prioritized_replay=False):
         self.name = name
         self.state_size = state_size
         self.action_size = action_size
         self.epsilon = epsilon  # Exploration rate for epsilon-greedy RL
 
-        # RL Q-network
-        self.q_net = SimpleMLP(state_size, action_size)
-        self.q_optimiser = optim.Adam(self.q_net.parameters(), lr=1e-3)
+        if shared_networks is not None:
+            # Reuse another agent's networks/optimisers (e.g. the same bot seated at several tables)
+            self.q_net = shared_networks.q_net
+            self.q_optimiser = shared_networks.q_optimiser
+            self.policy_net = shared_networks.policy_net
+            self.policy_optimiser = shared_networks.policy_optimiser
+        else:
+            # RL Q-network
+            self.q_net = SimpleMLP(state_size, action_size)
+            self.q_optimiser = optim.Adam(self.q_net.parameters(), lr=1e-3)
+
+            # SL policy network
+            self.policy_net = SimpleMLP(state_size, action_size)
+            self.policy_optimiser = optim.Adam(self.policy_net.parameters(), lr=1e-3)
 
-        # SL policy network
-        self.policy_net = SimpleMLP(state_size, action_size)
-        self.policy_optimiser = optim.Adam(self.policy_net.parameters(), lr=1e-3)
+        # Decision-time forward passes (see InferenceMLP); training still goes through the modules
+        self.q_infer = InferenceMLP(self.q_net)
+        self.policy_infer = InferenceMLP(self.policy_net)
 
-        # Replay buffers for RL and SL experiences
-        self.rl_buffer = ReplayBuffer(rl_buffer_size)
-        self.sl_buffer = ReplayBuffer(sl_buffer_size)
+        # Replay buffers for RL and SL experiences; the SL buffer is a reservoir so the
+        # average policy sees a uniform sample of the whole run, not just the newest decisions
+        # Prioritized replay samples by TD error so rare terminal-reward transitions are seen more often
+        self.prioritized_replay = prioritized_replay
+        rl_buffer_class = PrioritizedReplayBuffer if prioritized_replay else ReplayBuffer
+        self.rl_buffer = rl_buffer_class.for_transitions(rl_buffer_size, state_size)
+        self.sl_buffer = ReservoirBuffer.for_imitation(sl_buffer_size, state_size)
 
         # Loss functions
         self.loss_fn = nn.MSELoss()             # RL: value prediction
@@ -67,6 +134,36 @@ class NFSPAgent:
             elif style == "strategist":
                 pass  
 
+    def network_state(self):
+        """
+        Copies of both networks and their optimisers, safe to write out from another thread.
+        Returns:
+            dict of state_dicts keyed by attribute name.
+        """
+        return _compact_copy({
+            "q_net": self.q_net.state_dict(),
+            "q_optimiser": self.q_optimiser.state_dict(),
+            "policy_net": self.policy_net.state_dict(),
+            "policy_optimiser": self.policy_optimiser.state_dict(),
+        })
+
+    def load_network_state(self, state):
+        for name, value in state.items():
+            getattr(self, name).load_state_dict(value)
+
+    #Copies of this agent's own (never shared) state: exploration rate and replay buffers.
+    def buffer_state(self):
+        return {
+            "epsilon": self.epsilon,
+            "rl_buffer": self.rl_buffer.state_dict(),
+            "sl_buffer": self.sl_buffer.state_dict(),
+        }
+
+    def load_buffer_state(self, state):
+        self.epsilon = state["epsilon"]
+        self.rl_buffer.load_state_dict(state["rl_buffer"])
+        self.sl_buffer.load_state_dict(state["sl_buffer"])
+
     def select_action(self, state, use_avg_policy=False):
         """
         Selects an action based on either:
@@ -74,17 +171,36 @@ class NFSPAgent:
         - sampling from policy network distribution
         """
         if use_avg_policy:
-            with torch.no_grad():
-                logits = self.policy_net(state.unsqueeze(0))
-            probs = torch.softmax(logits, dim=1)
+            logits = self.policy_infer(state)
+            probs = torch.softmax(logits, dim=0)
             return torch.multinomial(probs, num_samples=1).item()
         else:
             if random.random() < self.epsilon:
                 return random.randint(0, self.action_size - 1)
-            with torch.no_grad():
-                q_values = self.q_net(state.unsqueeze(0))
-            return q_values.argmax(dim=1).item()
+            q_values = self.q_infer(state)
+            return int(q_values.argmax())
         
+    def select_actions(self, states, epsilons=None, use_avg_policy=False):
+        """
+        Batched version of select_action for an [N, state_size] tensor.
+        Runs a single forward pass for the whole batch; epsilons gives the
+        exploration rate per row (defaults to this agent's epsilon).
+        """
+        if use_avg_policy:
+            logits = self.policy_infer(states)
+            probs = torch.softmax(logits, dim=1)
+            return torch.multinomial(probs, num_samples=1).squeeze(1).tolist()
+
+        q_values = self.q_infer(states)
+        actions = q_values.argmax(dim=1).tolist()
+
+        if epsilons is None:
+            epsilons = [self.epsilon] * len(actions)
+        for i, eps in enumerate(epsilons):
+            if random.random() < eps:
+                actions[i] = random.randint(0, self.action_size - 1)
+        return actions
+
     def store_rl(self, transition):
         """
         Stores a (state, action, reward, next_state, done) tuple in the RL replay buffer.
@@ -96,31 +212,33 @@ class NFSPAgent:
         Stores a (state, action) pair in the SL buffer for imitation learning.
         """
         self.sl_buffer.push((state, action))
-        print(len(self.sl_buffer.buffer))  # Debug: monitor SL buffer growth
+        print(len(self.sl_buffer))  # Debug: monitor SL buffer growth
 
     def train_rl(self, batch_size=8, gamma=0.99):
         """
         Trains the Q-network on a mini-batch of experience using the Bellman equation.
         """
-        batch = self.rl_buffer.sample(batch_size)
-        if len(batch) < batch_size:
+        # Batch arrives column-wise as stacked tensors
+        if self.prioritized_replay:
+            batch, indices, weights = self.rl_buffer.sample_prioritized(batch_size)
+        else:
+            batch, weights = self.rl_buffer.sample(batch_size), None
+        states, actions, rewards, next_states, dones = batch
+        if len(actions) < batch_size:
             return
-        
-        # Unpack and preprocess batch
-        states, actions, rewards, next_states, dones = zip(*batch)
-        states = torch.stack(states)
-        actions = torch.tensor(actions)
-        rewards = torch.tensor(rewards, dtype=torch.float32)
-        next_states = torch.stack(next_states)
-        dones = torch.tensor(dones, dtype=torch.float32)
 
         # Compute Q-learning targets
         q_values = self.q_net(states).gather(1, actions.unsqueeze(1)).squeeze()
         next_q_values = self.q_net(next_states).max(1)[0].detach()
         targets = rewards + gamma * next_q_values * (1 - dones)
 
-        # Backpropagate loss
-        loss = self.loss_fn(q_values, targets)
+        # Backpropagate loss (importance-weighted, with refreshed priorities, under prioritized replay)
+        if weights is None:
+            loss = self.loss_fn(q_values, targets)
+        else:
+            td_errors = targets - q_values
+            loss = (weights * td_errors.pow(2)).mean()
+            self.rl_buffer.update_priorities(indices, td_errors.detach().numpy())
         self.q_optimiser.zero_grad()
         loss.backward()
         self.q_optimiser.step()
@@ -129,14 +247,10 @@ class NFSPAgent:
         """
         Trains the policy network to imitate stored (state, action) pairs via cross-entropy loss.
         """
-        batch = self.sl_buffer.sample(batch_size)
-        if len(batch) < batch_size:
+        states, actions = self.sl_buffer.sample(batch_size)
+        if len(actions) < batch_size:
             print("[TRAIN_POLICY] Skipped — not enough samples.")
             return
-        
-        states, actions = zip(*batch)
-        states = torch.stack(states)
-        actions = torch.tensor(actions)
 
         logits = self.policy_net(states)
         loss = self.ce_loss(logits, actions)
@@ -0,0 +1,310 @@
+import os
+import random
+from collections import deque
+import numpy as np
+from bot_base import BotBase
+
+"""
+Torch-free policy runtime.
+
+export_policy writes an agent's q_net/policy_net weights (plus epsilon) to a
+small .npz file; NumpyBot loads one and plays through a pure-NumPy SimpleMLP
+forward pass, so evaluation tables can run without importing torch:
+
+    python PokerBots/simulation.py --hands 1000 --export-policies policies
+    python PokerBots/simulation.py --hands 100000 --tables 64 --policy-dir policies
+
+NumpyBot is play-only: it keeps no replay buffers and never trains. With
+record=True it also collects the transitions it plays as NumPy arrays, which
+is how self-play workers (selfplay.py) generate experience for the torch
+learner from weights broadcast with policy_arrays.
+
+With quantize=True (--quantize) the weight matrices are stored as int8 with
+one float32 scale per output row, about a quarter of the float32 size. The
+export first compares the actions the int8 networks pick against the float
+ones over the bot's SL buffer states and refuses below min_agreement.
+"""
+
+NETWORKS = ("q_net", "policy_net")
+
+
+#Path of a bot's exported weights inside directory.
+def policy_path(directory, name):
+    return os.path.join(directory, f"{name}_policy.npz")
+
+
+def quantize_weight(weight):
+    """
+    Symmetric per-output-row int8 quantisation of a [out, in] weight matrix.
+    Returns:
+        (int8 [out, in] values, float32 [out] scales) with weight ~= values * scales[:, None]
+    """
+    scales = np.abs(weight).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    values = np.clip(np.round(weight / scales[:, None]), -127, 127).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+#Fraction of states on which two networks pick the same (argmax) action.
+def action_agreement(reference, candidate, states):
+    return float((reference(states).argmax(axis=1) == candidate(states).argmax(axis=1)).mean())
+
+
+def policy_arrays(agent):
+    """
+    An agent's epsilon and float32 network weights, named "<network>.<state_dict key>".
+    Only uses the tensors' own methods, so this module never imports torch.
+    Returns:
+        dict of NumPy arrays, as export_policy writes them and NumpyAgent loads them.
+    """
+    arrays = {
+        f"{network}.{key}": value.detach().cpu().numpy().astype(np.float32)
+        for network in NETWORKS
+        for key, value in getattr(agent, network).state_dict().items()
+    }
+    arrays["epsilon"] = np.float32(agent.epsilon)
+    return arrays
+
+
+def export_policy(agent, path, quantize=False, min_agreement=0.99, check_states=None):
+    """
+    Writes policy_arrays(agent) (with int8 weights plus "<key>.scale" when
+    quantize is set) to an .npz file.
+    check_states defaults to the states in the agent's SL buffer.
+    Returns:
+        {network: int8/float action agreement} ({} without quantize)
+    """
+    arrays = policy_arrays(agent)
+
+    agreement = {}
+    if quantize:
+        if check_states is None:
+            check_states = agent.sl_buffer.filled()[0].numpy()
+        if len(check_states) == 0:
+            raise ValueError(f"No states to check the quantized {agent.name} policy against")
+
+        quantized = dict(arrays)
+        for key in [key for key in arrays if key.endswith(".weight")]:
+            quantized[key], quantized[key + ".scale"] = quantize_weight(arrays[key])
+        for network in NETWORKS:
+            agreement[network] = action_agreement(_network(arrays, network), _network(quantized, network), check_states)
+        if min(agreement.values()) < min_agreement:
+            raise ValueError(f"Quantized {agent.name} policy picks the float policy's action on only "
+                             f"{min(agreement.values()):.2%} of states (need {min_agreement:.2%})")
+        arrays = quantized
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return agreement
+
+
+#Exports {bot name: agent} into directory; a bot whose int8 export is refused is written as float32.
+def export_policies(agents, directory, quantize=False, min_agreement=0.99):
+    for name, agent in agents.items():
+        path = policy_path(directory, name)
+        try:
+            agreement = export_policy(agent, path, quantize=quantize, min_agreement=min_agreement)
+        except ValueError as e:
+            print(f"[EXPORT] {e}; writing float32 weights instead")
+            agreement = export_policy(agent, path)
+        if agreement:
+            print(f"[EXPORT] {name} int8 action agreement: " +
+                  ", ".join(f"{network} {value:.2%}" for network, value in agreement.items()))
+    print(f"[EXPORT] Wrote {len(agents)} policies to {directory}")
+
+
+class NumpyMLP:
+    """
+    SimpleMLP forward pass in NumPy: Linear layers with ReLU between them.
+    Built from {"net.<index>.weight": W, "net.<index>.bias": b} arrays. int8
+    weights (with a "net.<index>.weight.scale" entry) are dequantized once
+    here: NumPy's integer matmul is far slower than its float32 one.
+    """
+
+    def __init__(self, arrays):
+        self.load(arrays)
+
+    #Replaces the weights in place, so everything holding this network sees the new ones.
+    def load(self, arrays):
+        indices = sorted({int(key.split(".")[1]) for key in arrays})
+        layers = []
+        for i in indices:
+            weight = arrays[f"net.{i}.weight"]
+            scales = arrays.get(f"net.{i}.weight.scale")
+            if scales is not None:
+                weight = weight.astype(np.float32) * scales[:, None]
+            layers.append((np.ascontiguousarray(weight.T), arrays[f"net.{i}.bias"]))
+        self.layers = layers
+
+    #Outputs for one [input_size] state or an [N, input_size] batch.
+    def __call__(self, x):
+        last = len(self.layers) - 1
+        for i, (weight_t, bias) in enumerate(self.layers):
+            x = x @ weight_t + bias
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        return x
+
+
+#One network's entries of an exported array dict, keyed like its state_dict.
+def _network_arrays(arrays, network):
+    prefix = network + "."
+    return {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+
+
+#NumpyMLP over one network's entries of an exported array dict.
+def _network(arrays, network):
+    return NumpyMLP(_network_arrays(arrays, network))
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class RecentPairs:
+    """
+    The newest (state, action) pairs a NumpyBot played, so GameLoop's
+    imitation step can read them like an SL buffer.
+    """
+
+    def __init__(self, size=16):
+        self.items = deque(maxlen=size)
+
+    def push(self, item):
+        self.items.append(item)
+
+    def recent(self, n):
+        return list(self.items)[-n:] if n > 0 else []
+
+    def clear(self):
+        self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class NumpyAgent:
+    """
+    Same action-selection API as nfsp_agent.NFSPAgent (select_action,
+    select_actions, epsilon) over exported weights, read from path or given
+    as policy_arrays. shared gives another NumpyAgent's networks (and
+    epsilon) to this one, like NFSPAgent's shared_networks.
+    """
+
+    def __init__(self, name, path=None, arrays=None, shared=None):
+        self.name = name
+        if shared is not None:
+            self.epsilon = shared.epsilon
+            self.q_net = shared.q_net
+            self.policy_net = shared.policy_net
+        else:
+            if arrays is None:
+                with np.load(path) as data:
+                    arrays = {key: data[key] for key in data.files}
+            self.epsilon = float(arrays["epsilon"])
+            for network in NETWORKS:
+                setattr(self, network, _network(arrays, network))
+        self.state_size = self.q_net.layers[0][0].shape[0]
+        self.action_size = len(self.q_net.layers[-1][1])
+        self.sl_buffer = RecentPairs()
+
+    #Swaps in new policy_arrays weights; agents sharing these networks see them too.
+    def load_arrays(self, arrays):
+        for network in NETWORKS:
+            getattr(self, network).load(_network_arrays(arrays, network))
+
+    def select_action(self, state, use_avg_policy=False):
+        if use_avg_policy:
+            probs = _softmax(self.policy_net(state))
+            return int(np.searchsorted(np.cumsum(probs), random.random() * probs.sum()))
+        if random.random() < self.epsilon:
+            return random.randint(0, self.action_size - 1)
+        return int(self.q_net(state).argmax())
+
+    def select_actions(self, states, epsilons=None, use_avg_policy=False):
+        if use_avg_policy:
+            return [self.select_action(state, use_avg_policy=True) for state in states]
+
+        actions = self.q_net(states).argmax(axis=1).tolist()
+        if epsilons is None:
+            epsilons = [self.epsilon] * len(actions)
+        for i, eps in enumerate(epsilons):
+            if random.random() < eps:
+                actions[i] = random.randint(0, self.action_size - 1)
+        return actions
+
+
+class NumpyBot(BotBase):
+    """
+    Play-only stand-in for Bots.BotWrapper backed by exported weights (a
+    file at path or in-memory policy_arrays). Use it on play_only GameLoops.
+    It never trains; with record=True it keeps the transitions and imitation
+    pairs a BotWrapper would have stored, until drain() hands them over.
+    """
+
+    #agent lets every seat of a bot share one loaded NumpyAgent (the weights are read-only).
+    def __init__(self, name, path=None, style="default", agent=None, arrays=None, record=False):
+        self.name = name
+        self.style = style
+        if agent is None:
+            agent = NumpyAgent(name, path, arrays=arrays)
+        elif record:
+            agent = NumpyAgent(name, shared=agent)  # Own recent pairs, so imitation copies this table's actions
+        self.agent = agent
+        self.opponent_stats = {}
+        self.opponent_profiles = {}
+        self.last_state_tensor = None
+        self.last_chip_count = 1000
+
+        self.record = record
+        self.transitions = []  # [state, action, reward, next_state, done] lists since the last drain
+        self.imitations = []  # (state, action) pairs since the last drain
+
+    def make_state(self, features):
+        return np.asarray(features, dtype=np.float32)
+
+    @staticmethod
+    def stack_states(state_tensors):
+        return np.stack(state_tensors)
+
+    #Keeps the (state, action) pair for the winner-imitation step, and the transition when recording.
+    def store_experience(self, state, action, reward, next_state, done):
+        self.agent.sl_buffer.push((state, action))
+        if self.record:
+            self.transitions.append([state, action, reward, next_state, done])
+            self.imitations.append((state, action))
+
+    def store_imitation(self, state, action):
+        if self.record:
+            self.imitations.append((state, action))
+
+    #Sets the terminal reward on the newest recorded transition.
+    def store_final_reward(self, final_reward):
+        if self.record and self.transitions:
+            self.transitions[-1][2] = final_reward
+            self.transitions[-1][4] = True
+
+    def drain(self):
+        """
+        Hands over and forgets what was recorded (and the recent pairs, as a
+        self-play worker clears a BotWrapper's buffers after every hand).
+        Returns:
+            {"rl": (states, actions, rewards, next_states, dones), "sl": (states, actions)}
+            NumPy column tuples in ReplayBuffer dtypes, each key only if there is data.
+        """
+        packed = {}
+        if self.transitions:
+            states, actions, rewards, next_states, dones = zip(*self.transitions)
+            packed["rl"] = (np.stack(states), np.array(actions, dtype=np.int64), np.array(rewards, dtype=np.float32),
+                            np.stack(next_states), np.array(dones, dtype=np.float32))
+        if self.imitations:
+            states, actions = zip(*self.imitations)
+            packed["sl"] = (np.stack(states), np.array(actions, dtype=np.int64))
+        self.transitions = []
+        self.imitations = []
+        self.agent.sl_buffer.clear()
+        return packed
@@ -0,0 +1,134 @@
+import os
+import struct
+import threading
+import numpy as np
+
+"""
+Memory-mapped replay store shared between processes.
+
+A fixed-capacity ring buffer of (state, action, reward, next_state, done)
+records kept in one file: a small header, a uint64 counter of transitions
+ever written, then the records. Self-play workers append to it directly and
+the learner samples from it through the same mapping, so experience never
+goes through pickling or SQL, and because it is a plain file the buffer is
+still there when a run is restarted.
+
+Appending needs only NumPy; torch is imported when rows are read back as
+tensors, so torch-free self-play workers can write to a store.
+
+Writers must share a lock (a multiprocessing Lock across processes). Readers
+don't lock: a row being overwritten at the wrap point may be sampled half
+written, which replay training tolerates.
+"""
+
+MAGIC = b"PKRS"
+VERSION = 1
+HEADER = struct.Struct("<4sIQI")  # magic, version, capacity, state size
+COUNTER_OFFSET = 64  # Total transitions ever written (uint64), on its own so it can be memory-mapped
+DATA_OFFSET = 128
+
+
+#One packed record per transition.
+def record_dtype(state_size):
+    return np.dtype([
+        ("state", np.float32, (state_size,)),
+        ("action", np.int64),
+        ("reward", np.float32),
+        ("next_state", np.float32, (state_size,)),
+        ("done", np.float32),
+    ])
+
+
+#Record fields as torch tensors (torch is imported here so writers never load it).
+def _tensors(rows, fields):
+    import torch
+    return tuple(torch.from_numpy(np.ascontiguousarray(rows[name])) for name in fields)
+
+
+class ReplayStore:
+    """
+    File-backed drop-in for a transitions ReplayBuffer (push, push_batch,
+    sample, arrays, clear, len). Opening an existing file resumes it; its
+    capacity and state size must match.
+    """
+
+    def __init__(self, path, capacity, state_size, lock=None):
+        self.path = path
+        self.lock = lock or threading.Lock()
+        self.dtype = record_dtype(state_size)
+        self.fields = list(self.dtype.names)
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                magic, version, stored_capacity, stored_state_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} replay store")
+            if (stored_capacity, stored_state_size) != (capacity, state_size):
+                raise ValueError(f"{path} holds capacity {stored_capacity} / state size {stored_state_size}, "
+                                 f"expected {capacity} / {state_size}")
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, capacity, state_size))
+                f.truncate(DATA_OFFSET + capacity * self.dtype.itemsize)  # Sparse; pages appear as rows are written
+            try:
+                os.link(tmp_path, path)  # Fails if another process created the store first
+            except FileExistsError:
+                pass
+            os.remove(tmp_path)
+
+        self.capacity = capacity
+        self.counter = np.memmap(path, dtype=np.uint64, mode="r+", offset=COUNTER_OFFSET, shape=(1,))
+        self.records = np.memmap(path, dtype=self.dtype, mode="r+", offset=DATA_OFFSET, shape=(capacity,))
+
+    @property
+    def total_written(self):
+        return int(self.counter[0])
+
+    def __len__(self):
+        return min(self.total_written, self.capacity)
+
+    #Appends transitions given as one tensor/array per column (CPU tensors convert through np.asarray).
+    def push_batch(self, *columns):
+        count = len(columns[0])
+        if count == 0:
+            return
+        rows = np.empty(count, dtype=self.dtype)
+        for name, values in zip(self.fields, columns):
+            rows[name] = np.asarray(values)
+        if count > self.capacity:
+            rows = rows[-self.capacity:]
+
+        with self.lock:
+            total = self.total_written
+            positions = (total + count - len(rows) + np.arange(len(rows))) % self.capacity  # Truncated rows are the newest
+            self.records[positions] = rows
+            self.counter[0] = total + count  # Publish only after the rows are in place
+
+    def push(self, item):
+        self.push_batch(*([value] for value in item))
+
+    #Randomly samples a batch, returned as one tensor per column (like ReplayBuffer.sample).
+    def sample(self, batch_size):
+        size = len(self)
+        if size <= batch_size:
+            indices = np.random.permutation(size)
+        else:
+            indices = np.random.randint(0, size, batch_size)
+        return _tensors(self.records[indices], self.fields)
+
+    #Copies of every column in insertion order.
+    def arrays(self):
+        total = self.total_written
+        size = min(total, self.capacity)
+        return _tensors(self.records[(total - size + np.arange(size)) % self.capacity], self.fields)
+
+    def clear(self):
+        with self.lock:
+            self.counter[0] = 0
+
+    #Writes dirty pages back to the file (the OS does this anyway; call before a checkpoint).
+    def flush(self):
+        self.counter.flush()
+        self.records.flush()
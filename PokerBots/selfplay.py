@@ -0,0 +1,269 @@
+import argparse
+import contextlib
+import os
+import queue
+import time
+import multiprocessing as mp
+import numpy as np
+from bot_base import style_epsilon
+from numpy_policy import policy_arrays
+from replay_store import ReplayStore
+from simulation import DEFAULT_BOTS, MultiTableEngine, print_report
+
+"""
+Multi-process self-play.
+
+Spawns N worker processes, each running its own lockstep tables of
+recording numpy_policy.NumpyBots. Workers ship transitions to the learner
+(the launching process) as NumPy arrays; the learner owns the NFSPAgent
+optimisers, trains on incoming data and periodically broadcasts new weights
+as policy_arrays. Only the learner imports torch (this module loads it
+inside run_selfplay), so a worker costs no torch start-up or memory:
+
+    python PokerBots/selfplay.py --workers 31 --tables 16 --hands 100000
+
+With --replay-dir, each bot's RL transitions go into a memory-mapped
+replay_store.ReplayStore that workers append to and the learner samples
+from directly; it persists, so a restarted run resumes with its buffer.
+"""
+
+RL_BUFFER_SIZE = 50000
+
+
+#Path of a bot's shared replay store inside replay_dir.
+def replay_store_path(replay_dir, name):
+    return os.path.join(replay_dir, f"{name}_replay.bin")
+
+
+#Snapshot of every agent's weights as NumPy arrays, as sent to the workers.
+def network_weights(agents):
+    return {name: policy_arrays(agent) for name, agent in agents.items()}
+
+
+#Loads a weights snapshot into the worker's shared (per-bot) NumpyAgents.
+def load_network_weights(agents, weights):
+    for name, arrays in weights.items():
+        if name in agents:
+            agents[name].load_arrays(arrays)
+
+
+#Joins a bot's drained column tuples into single arrays for cheap transport to the learner.
+def pack_transitions(rl_parts, sl_parts):
+    packed = {}
+    if rl_parts:
+        packed["rl"] = tuple(np.concatenate(column) for column in zip(*rl_parts))
+    if sl_parts:
+        packed["sl"] = tuple(np.concatenate(column) for column in zip(*sl_parts))
+    return packed
+
+
+#Pushes a packed batch from a worker into the learner agent's replay buffers.
+def push_transitions(agent, packed):
+    import torch
+    if "rl" in packed:
+        agent.rl_buffer.push_batch(*(torch.from_numpy(column) for column in packed["rl"]))
+    if "sl" in packed:
+        agent.sl_buffer.push_batch(*(torch.from_numpy(column) for column in packed["sl"]))
+
+
+def selfplay_worker(worker_id, num_tables, bots, transition_queue, weights_queue, stop_event, flush_every,
+                    replay_dir=None, store_locks=None):
+    """
+    Worker process entry point: plays play-only tables of recording NumpyBots
+    and ships every finished hand's transitions to the learner (RL
+    transitions go straight into the shared replay stores when replay_dir is set).
+    """
+    outbox = {name: ([], []) for name, _style in bots}
+    stores = {}
+    if replay_dir:
+        stores = {
+            name: ReplayStore(replay_store_path(replay_dir, name), RL_BUFFER_SIZE, 20, lock=store_locks[name])
+            for name, _style in bots
+        }
+
+    def collect(hand_bots):
+        for bot in hand_bots:
+            rl_parts, sl_parts = outbox.setdefault(bot.name, ([], []))
+            packed = bot.drain()
+            if "rl" in packed:
+                if bot.name in stores:
+                    stores[bot.name].push_batch(*packed["rl"])
+                else:
+                    rl_parts.append(packed["rl"])
+            if "sl" in packed:
+                sl_parts.append(packed["sl"])
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        # Start from the learner's weights so every worker plays the same policy
+        engine = MultiTableEngine(num_tables, bots=bots, play_only=True, on_hand_end=collect,
+                                  policies=weights_queue.get())
+
+        hands_sent = 0
+        decisions_sent = 0
+
+        def flush():
+            nonlocal hands_sent, decisions_sent
+            message = {
+                "worker": worker_id,
+                "hands": engine.hands_played - hands_sent,
+                "decisions": engine.decisions - decisions_sent,
+                "bots": {name: pack_transitions(rl, sl) for name, (rl, sl) in outbox.items()},
+            }
+            for rl_parts, sl_parts in outbox.values():
+                rl_parts.clear()
+                sl_parts.clear()
+            hands_sent += message["hands"]
+            decisions_sent += message["decisions"]
+            transition_queue.put(message)  # Blocks when the learner falls behind
+
+        while not stop_event.is_set():
+            # Apply the newest broadcast, skipping any stale ones still queued
+            latest = None
+            while True:
+                try:
+                    latest = weights_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if latest is not None:
+                load_network_weights(engine.shared_agents, latest)
+
+            engine.step()
+            if engine.hands_played - hands_sent >= flush_every:
+                flush()
+
+        if engine.hands_played > hands_sent:
+            flush()
+
+
+def run_selfplay(num_workers=4, tables_per_worker=16, num_hands=10000, batch_size=32, gamma=0.99,
+                 train_steps=1, sync_every=10, flush_every=8, bots=DEFAULT_BOTS, quiet=True, prioritized_replay=False,
+                 replay_dir=None):
+    """
+    Runs self-play workers until num_hands hands have been reported, training
+    the learner's agents on every incoming batch.
+    Returns:
+        (stats dict, {bot name: NFSPAgent}) with the trained learner agents.
+    """
+    if replay_dir and prioritized_replay:
+        raise ValueError("Prioritized replay keeps its priorities in memory and can't use a shared replay store")
+    from nfsp_agent import NFSPAgent  # Imported here so spawned workers, which import this module, never load torch
+
+    ctx = mp.get_context("spawn")
+    agents = {}
+    store_locks = {}
+    for name, style in bots:
+        agents[name] = NFSPAgent(name, state_size=20, action_size=3, rl_buffer_size=RL_BUFFER_SIZE,
+                                 prioritized_replay=prioritized_replay)
+        agents[name].initialise_with_style(style)
+        agents[name].epsilon = style_epsilon(style)  # Broadcast with the weights; the workers explore with it
+        if replay_dir:
+            # Sample straight from the file the workers append to
+            store_locks[name] = ctx.Lock()
+            agents[name].rl_buffer = ReplayStore(replay_store_path(replay_dir, name), RL_BUFFER_SIZE, 20,
+                                                 lock=store_locks[name])
+
+    transition_queue = ctx.Queue(maxsize=num_workers * 4)
+    weights_queues = [ctx.Queue() for _ in range(num_workers)]
+    stop_event = ctx.Event()
+
+    initial_weights = network_weights(agents)
+    for weights_queue in weights_queues:
+        weights_queue.put(initial_weights)
+        weights_queue.cancel_join_thread()  # Unread broadcasts must not block shutdown
+
+    workers = [
+        ctx.Process(
+            target=selfplay_worker,
+            args=(i, tables_per_worker, bots, transition_queue, weights_queues[i], stop_event, flush_every,
+                  replay_dir, store_locks),
+            daemon=True,
+        )
+        for i in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    hands = decisions = updates = 0
+    sink = open(os.devnull, "w") if quiet else None
+    redirect = contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext()
+
+    start = time.perf_counter()
+    try:
+        with redirect:
+            while hands < num_hands:
+                try:
+                    message = transition_queue.get(timeout=5)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        break
+                    continue
+
+                hands += message["hands"]
+                decisions += message["decisions"]
+                for name, packed in message["bots"].items():
+                    if name in agents:
+                        push_transitions(agents[name], packed)
+
+                for agent in agents.values():
+                    for _ in range(train_steps):
+                        agent.train_rl(batch_size, gamma)
+                        agent.train_policy(batch_size)
+                updates += 1
+
+                if updates % sync_every == 0:
+                    weights = network_weights(agents)
+                    for weights_queue in weights_queues:
+                        weights_queue.put(weights)
+    finally:
+        stop_event.set()
+        # Keep draining so workers blocked on a full queue can exit
+        for worker in workers:
+            while worker.is_alive():
+                try:
+                    transition_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                worker.join(timeout=0.1)
+        if sink:
+            sink.close()
+        if replay_dir:
+            for agent in agents.values():
+                agent.rl_buffer.flush()
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "hands": hands,
+        "decisions": decisions,
+        "elapsed": elapsed,
+        "hands_per_sec": hands / max(elapsed, 1e-9),
+        "decisions_per_sec": decisions / max(elapsed, 1e-9),
+        "updates": updates,
+    }
+    return stats, agents
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process self-play with a central learner.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Number of self-play processes")
+    parser.add_argument("--tables", type=int, default=16, help="Lockstep tables per worker")
+    parser.add_argument("--hands", type=int, default=10000, help="Total hands to play across all workers")
+    parser.add_argument("--train-steps", type=int, default=1, help="Gradient steps per network per incoming batch")
+    parser.add_argument("--prioritized", action="store_true", help="Use prioritized experience replay in the learner")
+    parser.add_argument("--sync-every", type=int, default=10, help="Broadcast weights every N learner updates")
+    parser.add_argument("--replay-dir", default=None, help="Keep RL transitions in shared memory-mapped stores in this directory")
+    args = parser.parse_args()
+
+    stats, _agents = run_selfplay(
+        num_workers=args.workers,
+        tables_per_worker=args.tables,
+        num_hands=args.hands,
+        train_steps=args.train_steps,
+        sync_every=args.sync_every,
+        prioritized_replay=args.prioritized,
+        replay_dir=args.replay_dir,
+    )
+    print_report(stats)
+    print(f"[SELFPLAY] Learner made {stats['updates']} updates")
+    if args.replay_dir:
+        for name, agent in _agents.items():
+            print(f"[SELFPLAY] {name} replay store holds {len(agent.rl_buffer)} transitions")
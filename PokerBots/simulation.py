@@ -0,0 +1,347 @@
+import argparse
+import contextlib
+import os
+import time
+from collections import defaultdict
+from GameLogic import GameLoop, Player, STATE_SIZE, EQUITY_STATE_SIZE
+from equity import EquityEngine
+from strength_tables import StrengthTables
+from training_scheduler import TrainingScheduler
+from experience_writer import ExperienceWriter
+from training_log import compact_logs
+from numpy_policy import NumpyBot, policy_path, export_policies
+
+"""
+Headless simulation runner.
+
+Drives GameLoop hand after hand without pygame, frame ticks or artificial
+delays. Used for training runs where the UI-bound rate is the bottleneck:
+
+    python PokerBots/simulation.py --hands 10000
+    python PokerBots/simulation.py --hands 10000 --tables 64
+    python PokerBots/simulation.py --hands 10000 --train-every 16 --train-steps 8 --background-training
+
+With --policy-dir the tables are play-only NumpyBots loaded from exported
+weights (see numpy_policy.py) and torch is never imported.
+"""
+
+DEFAULT_BOTS = [
+    ("novice", "novice"),
+    ("agressive", "agressive"),
+    ("conservative", "conservative"),
+    ("strategist", "strategist"),
+]
+
+
+#Creates one bot; with policy_dir a torch-free NumpyBot, otherwise a learning BotWrapper.
+#policies ({name: numpy_policy.policy_arrays}) gives recording NumpyBots instead (self-play workers).
+def make_bot(name, style, state_size=STATE_SIZE, policy_dir=None, shared_agent=None, policies=None):
+    if policies is not None:
+        return NumpyBot(name, style=style, agent=shared_agent, arrays=policies[name], record=True)
+    if policy_dir:
+        return NumpyBot(name, policy_path(policy_dir, name), style=style, agent=shared_agent)
+    from Bots import BotWrapper  # Imported here so policy_dir runs never load torch
+    return BotWrapper(name, style=style, state_size=state_size, shared_agent=shared_agent)
+
+
+#Builds the same four-bot table that PokerGameUI sets up.
+def build_default_players(state_size=STATE_SIZE, policy_dir=None):
+    return [
+        Player(name, is_bot=True, bot_instance=make_bot(name, style, state_size, policy_dir))
+        for name, style in DEFAULT_BOTS
+    ]
+
+
+class HeadlessTable:
+    """
+    Steps a single GameLoop through the same sequence PokerGameUI.run() uses
+    (bot_take_action -> handle_betting_round -> next_turn -> reset_if_ready),
+    but without waiting between actions.
+    """
+
+    def __init__(self, game, on_hand_end=None):
+        self.game = game
+        self.hands_played = 0
+        self.decisions = 0
+        self.on_hand_end = on_hand_end  # Called with the hand's bot wrappers once it has been reset
+
+    #Resolves round resets and stalled turns until a bot is due to act.
+    def pending_player(self):
+        while True:
+            game = self.game
+            if game.state in ["showdown", "end_round"]:
+                # Capture bots first: a finished game reseats them in new Player objects
+                bots = [p.bot_instance for p in game.players if p.is_bot]
+                if getattr(game, "_ready_to_reset", False):
+                    game.reset_if_ready()
+                else:
+                    game.reset_round()
+                game._request_ui_clear = False
+                self.hands_played += 1
+                if self.on_hand_end:
+                    self.on_hand_end(bots)
+                return None
+
+            manager = game.betting_manager
+            candidate = manager.current_player()
+
+            if candidate is None:
+                # Nobody left who can act this street (e.g. everyone all-in)
+                state_before = game.state
+                game.handle_betting_round()
+                if game.state == state_before and game.betting_manager.current_player() is None:
+                    game.advance_game_phase()
+                continue
+
+            if candidate.eliminated or candidate.chips <= 0:
+                if not manager.next_turn():
+                    game.handle_betting_round()
+                continue
+
+            if not candidate.is_bot:
+                return None
+            return candidate
+
+    #Mirrors the UI's bookkeeping after a bot has acted.
+    def finish_turn(self):
+        game = self.game
+        game.handle_betting_round()
+        if game.state != "showdown":
+            has_next = game.betting_manager.next_turn()
+            if not has_next:
+                game.handle_betting_round()
+
+    #Plays a single bot decision (or a round reset if one is due).
+    def step(self):
+        player = self.pending_player()
+        if player is None:
+            return
+        if self.game.can_bot_act(player):
+            self.decisions += 1
+        self.game.bot_take_action(player)
+        self.finish_turn()
+
+
+class MultiTableEngine:
+    """
+    Advances many independent tables in lockstep. Each bot name is seated at
+    every table with its own buffers and opponent stats, but all of its
+    seats share one q_net/policy_net, so every step gathers the pending
+    decisions for a bot into one [N, state_size] batch and runs a single
+    forward pass for it.
+    """
+
+    def __init__(self, num_tables, bots=DEFAULT_BOTS, play_only=False, on_hand_end=None, equity_engine=None, game_options=None,
+                 policy_dir=None, policies=None):
+        self.styles = dict(bots)
+        self.policy_dir = policy_dir
+        self.policies = policies
+        self.grouped = None  # Optional grouped_networks.GroupedNetworks over the shared agents
+        self.shared_agents = {}
+        self.tables = []
+        self.state_size = EQUITY_STATE_SIZE if equity_engine else STATE_SIZE
+
+        for _ in range(num_tables):
+            players = [
+                Player(name, is_bot=True, bot_instance=self._make_bot(name))
+                for name, _style in bots
+            ]
+            game = GameLoop(player_objs=players, play_only=play_only, equity_engine=equity_engine, **(game_options or {}))
+            game.deal_hole_cards()
+            self.tables.append(HeadlessTable(game, on_hand_end=on_hand_end))
+
+    #Creates a table-local wrapper; the first one per name owns the shared networks.
+    def _make_bot(self, name):
+        style = self.styles.get(name, "default")
+        owner = self.shared_agents.get(name)
+        bot = make_bot(name, style, self.state_size, self.policy_dir, shared_agent=owner, policies=self.policies)
+        if owner is None:
+            self.shared_agents[name] = bot.agent
+        return bot
+
+    @property
+    def hands_played(self):
+        return sum(table.hands_played for table in self.tables)
+
+    @property
+    def decisions(self):
+        return sum(table.decisions for table in self.tables)
+
+    #Advances every table by at most one decision, batching inference per bot (or across all bots when grouped).
+    def step(self):
+        groups = defaultdict(list)
+        for table in self.tables:
+            player = table.pending_player()
+            if player is None:
+                continue
+            game = table.game
+            if not game.can_bot_act(player):
+                table.finish_turn()
+                continue
+            state_tensor = game.get_bot_state(player)
+            can_check = player.total_bet == game.betting_manager.current_bet
+            groups[player.bot_instance.agent.q_net].append((table, player, state_tensor, can_check))
+
+        # (tables, players, states, can_checks) for each bot
+        pending = [list(zip(*entries)) for entries in groups.values()]
+        bot_groups = [[player.bot_instance for player in players] for _tables, players, _states, _checks in pending]
+        state_groups = [list(states) for _tables, _players, states, _checks in pending]
+        check_groups = [list(can_checks) for _tables, _players, _states, can_checks in pending]
+        if self.grouped is not None and pending:
+            # One forward pass for every bot's batch
+            action_groups = self.grouped.decide_actions_batched(bot_groups, state_groups, check_groups)
+        else:
+            action_groups = [
+                bots[0].decide_actions_batched(bots, states, can_checks)
+                for bots, states, can_checks in zip(bot_groups, state_groups, check_groups)
+            ]
+
+        for (tables, players, states, _can_checks), actions in zip(pending, action_groups):
+            for table, player, state_tensor, action in zip(tables, players, states, actions):
+                table.game.apply_bot_action(player, state_tensor, action)
+                table.decisions += 1
+                table.finish_turn()
+
+
+def run_headless(num_hands=1000, players=None, quiet=True, num_tables=1, equity_engine=None, game_options=None,
+                 policy_dir=None, resume=False, grouped=False):
+    """
+    Plays num_hands hands back-to-back and reports throughput.
+    With num_tables > 1 the hands are spread over a lockstep MultiTableEngine.
+    game_options are extra GameLoop keyword arguments (e.g. accuracy_interval).
+    policy_dir plays exported NumpyBots on play-only tables.
+    resume loads the newest checkpoint of game_options["checkpointer"] before playing.
+    grouped evaluates (with several tables) and trains the bots' networks as one
+    stacked model (see grouped_networks.py).
+    Returns:
+        dict with hands, decisions, elapsed seconds, hands/sec, decisions/sec
+        and agents ({bot name: agent} as the run ended).
+    """
+    if resume and not (game_options or {}).get("checkpointer"):
+        raise ValueError("resume needs game_options['checkpointer']")
+
+    play_only = policy_dir is not None
+    if num_tables > 1:
+        runner = MultiTableEngine(num_tables, play_only=play_only, equity_engine=equity_engine, game_options=game_options,
+                                  policy_dir=policy_dir)
+    else:
+        if players is None:
+            players = build_default_players(EQUITY_STATE_SIZE if equity_engine else STATE_SIZE, policy_dir)
+        game = GameLoop(player_objs=players, play_only=play_only, equity_engine=equity_engine, **(game_options or {}))
+        game.deal_hole_cards()
+        runner = HeadlessTable(game)
+
+    if resume:
+        game_options["checkpointer"].restore()
+
+    if grouped:
+        from grouped_networks import GroupedNetworks
+        games = [table.game for table in runner.tables] if num_tables > 1 else [runner.game]
+        networks = GroupedNetworks(_agents(runner, num_tables).values())  # After any restore, see grouped_networks.py
+        for game in games:
+            game.training_scheduler.use_grouped(networks)
+        if num_tables > 1:
+            runner.grouped = networks
+
+    # The engine logs every action; silence it so I/O doesn't dominate the run
+    sink = open(os.devnull, "w") if quiet else None
+    redirect = contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext()
+
+    start = time.perf_counter()
+    try:
+        with redirect:
+            while runner.hands_played < num_hands:
+                runner.step()
+    finally:
+        if sink:
+            sink.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "hands": runner.hands_played,
+        "decisions": runner.decisions,
+        "elapsed": elapsed,
+        "hands_per_sec": runner.hands_played / max(elapsed, 1e-9),
+        "decisions_per_sec": runner.decisions / max(elapsed, 1e-9),
+        "agents": _agents(runner, num_tables),
+    }
+
+
+#{bot name: agent} of a run_headless runner (the shared agents when there are several tables).
+def _agents(runner, num_tables):
+    if num_tables > 1:
+        return runner.shared_agents
+    return {player.name: player.bot_instance.agent for player in runner.game.players if player.is_bot}
+
+
+def print_report(stats):
+    print(f"[SIM] Played {stats['hands']} hands ({stats['decisions']} decisions) in {stats['elapsed']:.2f}s")
+    print(f"[SIM] {stats['hands_per_sec']:.1f} hands/sec, {stats['decisions_per_sec']:.1f} decisions/sec")
+
+
+#Training run driven by the command-line options: shared scheduler, optional async writer, log compaction, export.
+def run_training(args, equity_engine):
+    # One scheduler for every table, so the training cadence counts hands across all of them
+    scheduler = TrainingScheduler(every_hands=args.train_every, every_transitions=args.train_every_transitions,
+                                  steps=args.train_steps, background=args.background_training)
+    writer = ExperienceWriter() if args.async_writes else None
+    from checkpoint import Checkpointer  # Imports torch, so only training runs load it
+    checkpointer = Checkpointer(args.checkpoint_dir, every_hands=args.checkpoint_every)
+    game_options = {"accuracy_interval": args.accuracy_every, "accuracy_sample_size": args.accuracy_sample,
+                    "training_scheduler": scheduler, "experience_writer": writer, "checkpointer": checkpointer}
+    try:
+        stats = run_headless(num_hands=args.hands, quiet=not args.verbose, num_tables=args.tables,
+                             equity_engine=equity_engine, game_options=game_options, resume=args.resume,
+                             grouped=args.grouped)
+        print_report(stats)
+    finally:
+        scheduler.close()
+        if writer:
+            writer.close()
+        checkpointer.close()
+        if os.path.isdir("training_logs"):
+            compact_logs()  # Refresh round_wins.json / accuracy_log.json for the plotting scripts
+    print(f"[TRAIN] {scheduler.updates} training updates")
+    if args.export_policies:
+        export_policies(stats["agents"], args.export_policies, quantize=args.quantize, min_agreement=args.min_agreement)
+    if writer:
+        print(f"[WRITER] {writer.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run poker bot hands without the pygame UI.")
+    parser.add_argument("--hands", type=int, default=1000, help="Number of hands to play")
+    parser.add_argument("--tables", type=int, default=1, help="Number of tables to run in lockstep")
+    parser.add_argument("--equity", action="store_true", help="Give bots a Monte Carlo equity feature")
+    parser.add_argument("--strength-tables", default=None, help="Precomputed strength table file for the equity feature "
+                                                                 "(combined with --equity, Monte Carlo is only used post-flop)")
+    parser.add_argument("--accuracy-every", type=int, default=1, help="Log policy accuracy every N rounds (0 disables it)")
+    parser.add_argument("--accuracy-sample", type=int, default=None, help="Measure accuracy on N random SL entries instead of the whole buffer")
+    parser.add_argument("--train-every", type=int, default=1, help="Train the bots every N hands")
+    parser.add_argument("--train-every-transitions", type=int, default=0, help="Also train once N new transitions have been stored")
+    parser.add_argument("--train-steps", type=int, default=1, help="Gradient steps per network per training update")
+    parser.add_argument("--background-training", action="store_true", help="Train on a background thread while play continues")
+    parser.add_argument("--grouped", action="store_true", help="Evaluate and train all bots' networks as one stacked model")
+    parser.add_argument("--async-writes", action="store_true", help="Write experiences to SQLite on a background thread")
+    parser.add_argument("--export-policies", default=None, help="Write each bot's networks to this directory after the run")
+    parser.add_argument("--quantize", action="store_true", help="Export int8 weights (checked against the float policy first)")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="Lowest int8/float action agreement --quantize accepts")
+    parser.add_argument("--policy-dir", default=None, help="Play-only evaluation with exported policies (no torch)")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="Checkpoint the bots every N hands (0 disables it)")
+    parser.add_argument("--checkpoint-dir", default="training_logs/checkpoints", help="Where checkpoints are written and resumed from")
+    parser.add_argument("--resume", action="store_true", help="Continue from the newest checkpoint in --checkpoint-dir")
+    parser.add_argument("--verbose", action="store_true", help="Keep the engine's per-action logging")
+    args = parser.parse_args()
+    if args.grouped and args.background_training:
+        parser.error("--grouped trains inline and can't be combined with --background-training")
+
+    monte_carlo = EquityEngine() if args.equity else None
+    equity_engine = StrengthTables(args.strength_tables, fallback=monte_carlo) if args.strength_tables else monte_carlo
+
+    if args.policy_dir:
+        print_report(run_headless(num_hands=args.hands, quiet=not args.verbose, num_tables=args.tables,
+                                  equity_engine=equity_engine, policy_dir=args.policy_dir))
+    else:
+        run_training(args, equity_engine)
+    if monte_carlo:
+        print(f"[EQUITY] Cache hits: {monte_carlo.hits}, misses: {monte_carlo.misses}")
@@ -0,0 +1,152 @@
+import argparse
+import os
+import struct
+import time
+import numpy as np
+from equity import showdown_shares
+
+"""
+Precomputed preflop and flop-texture strength tables.
+
+Preflop strength only depends on the 169 canonical starting hands and the
+number of opponents, so it is computed once offline and written to a small
+binary file. StrengthTables memory-maps that file, making lookups O(1) with
+near-zero startup cost and letting worker processes share the pages.
+
+Generate the artifact with:
+
+    python PokerBots/strength_tables.py --out PokerBots/Assets/strength_tables.bin
+"""
+
+MAGIC = b"PKST"
+VERSION = 1
+HEADER = struct.Struct("<4sIIII")  # magic, version, classes, textures, max opponents
+
+NUM_CLASSES = 169
+NUM_TEXTURES = 27
+MAX_OPPONENTS = 8
+DEFAULT_PATH = "PokerBots/Assets/strength_tables.bin"
+
+
+#Index 0-168 of a starting hand on the 13x13 grid: pairs on the diagonal, suited above, offsuit below.
+def preflop_class(card1, card2):
+    high, low = max(card1 >> 2, card2 >> 2), min(card1 >> 2, card2 >> 2)
+    if (card1 & 3) == (card2 & 3) and high != low:
+        return high * 13 + low
+    return low * 13 + high
+
+
+#Representative (card1, card2) for each class; suited hands share suit 0.
+def class_representative(index):
+    row, col = divmod(index, 13)
+    if row > col:
+        return (row << 2, col << 2)  # Suited
+    return (row << 2, (col << 2) | 1)  # Pair or offsuit
+
+
+def flop_textures(flops):
+    """
+    Buckets [N, 3] flops into 27 textures:
+    suit pattern (rainbow / two-tone / monotone) x pairing (none / pair / trips)
+    x high card (9 or lower / T-Q / K-A).
+    """
+    flops = np.asarray(flops, dtype=np.int64).reshape(-1, 3)
+    ranks = flops >> 2
+    suits = flops & 3
+
+    suit_matches = (suits[:, [0, 0, 1]] == suits[:, [1, 2, 2]]).sum(axis=1)
+    suit_pattern = np.select([suit_matches == 3, suit_matches == 1], [2, 1], default=0)
+    rank_matches = (ranks[:, [0, 0, 1]] == ranks[:, [1, 2, 2]]).sum(axis=1)
+    pairing = np.select([rank_matches == 3, rank_matches == 1], [2, 1], default=0)
+    high = ranks.max(axis=1) + 2
+    high_bucket = np.select([high >= 13, high >= 10], [2, 1], default=0)
+
+    return suit_pattern * 9 + pairing * 3 + high_bucket
+
+
+def rollout_class(hole, num_opponents, samples, rng):
+    """
+    Plays samples random boards and opponent hands for one starting hand.
+    Returns:
+        (overall equity, [NUM_TEXTURES] summed equity per flop texture, [NUM_TEXTURES] sample counts)
+    """
+    share, board = showdown_shares(list(hole), [], num_opponents, samples, rng)
+    textures = flop_textures(board[:, :3])
+    counts = np.bincount(textures, minlength=NUM_TEXTURES)
+    totals = np.bincount(textures, weights=share, minlength=NUM_TEXTURES)
+    return share.mean(), totals, counts
+
+
+def generate_tables(samples=4000, seed=0):
+    """
+    Computes preflop equity [169, 8] and flop-texture equity [169, 27, 8].
+    Textures that no sample hit fall back to the preflop equity.
+    """
+    rng = np.random.default_rng(seed)
+    preflop = np.zeros((NUM_CLASSES, MAX_OPPONENTS), dtype=np.float32)
+    flop = np.zeros((NUM_CLASSES, NUM_TEXTURES, MAX_OPPONENTS), dtype=np.float32)
+
+    for index in range(NUM_CLASSES):
+        hole = class_representative(index)
+        for opponents in range(1, MAX_OPPONENTS + 1):
+            overall, totals, counts = rollout_class(hole, opponents, samples, rng)
+            preflop[index, opponents - 1] = overall
+            flop[index, :, opponents - 1] = np.where(counts > 0, totals / np.maximum(counts, 1), overall)
+
+    return preflop, flop
+
+
+#Writes the header followed by the raw float32 tables.
+def write_tables(path, preflop, flop):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, NUM_CLASSES, NUM_TEXTURES, MAX_OPPONENTS))
+        f.write(np.ascontiguousarray(preflop, dtype=np.float32).tobytes())
+        f.write(np.ascontiguousarray(flop, dtype=np.float32).tobytes())
+    os.replace(tmp_path, path)
+
+
+class StrengthTables:
+    """
+    Memory-mapped view of a strength table file. Provides the same
+    equity(hole, board, num_opponents) call as equity.EquityEngine, so it can
+    be passed to GameLoop as its equity_engine. Post-flop spots use the flop
+    texture table unless a fallback engine is given for them.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, fallback=None):
+        with open(path, "rb") as f:
+            magic, version, classes, textures, max_opponents = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} strength table file")
+
+        self.fallback = fallback
+        self.max_opponents = max_opponents
+        self.preflop = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER.size,
+                                 shape=(classes, max_opponents))
+        self.flop = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER.size + self.preflop.nbytes,
+                              shape=(classes, textures, max_opponents))
+
+    def equity(self, hole, board, num_opponents):
+        column = min(max(1, num_opponents), self.max_opponents) - 1
+        index = preflop_class(hole[0], hole[1])
+        if len(board) < 3:
+            return float(self.preflop[index, column])
+        if self.fallback:
+            return self.fallback.equity(hole, board, num_opponents)
+        texture = int(flop_textures(board[:3])[0])
+        return float(self.flop[index, texture, column])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate preflop and flop-texture strength tables.")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="Output file")
+    parser.add_argument("--samples", type=int, default=4000, help="Rollouts per starting hand and opponent count")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    preflop, flop = generate_tables(samples=args.samples, seed=args.seed)
+    write_tables(args.out, preflop, flop)
+    print(f"[TABLES] Wrote {args.out} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,47 @@
+import torch
+from Bots import BotWrapper
+
+"""
+BotWrapper's SQLite experience round trip.
+Run with: python -m pytest PokerBots/test_bots.py
+"""
+
+STATE_SIZE = 20
+
+
+#Stores one transition in bot and writes it to SQLite as its own save.
+def store_and_save(bot, action):
+    bot.store_experience(torch.rand(STATE_SIZE), action, 1.0, torch.rand(STATE_SIZE), False)
+    bot.save_experiences_to_sqlite()
+
+
+def test_train_after_many_interleaved_saves(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Two seats of one bot share a database, so their saves interleave and no ranges can merge
+    first = BotWrapper("many_saves", state_size=STATE_SIZE)
+    second = BotWrapper("many_saves", state_size=STATE_SIZE)
+    for bot in (first, second):
+        store_and_save(bot, 0)
+        bot.train()
+
+    saves = 1200
+    for i in range(saves):
+        store_and_save(first, 1)
+        store_and_save(second, 2)
+    assert len(first.saved_ranges) == saves
+
+    first.train()  # Used to exceed SQLite's expression depth with one NOT BETWEEN per range
+    assert first.saved_ranges == []
+    actions = first.agent.rl_buffer.filled()[1]
+    assert (actions == 1).sum() == saves  # Its own rows, from the buffer only
+    assert (actions == 2).sum() == saves  # The other seat's rows, each loaded once
+    assert (actions == 0).sum() == 2
+
+
+def test_consecutive_saves_merge_into_one_range(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = BotWrapper("merged_saves", state_size=STATE_SIZE)
+    for _ in range(5):
+        store_and_save(bot, 1)
+    assert len(bot.saved_ranges) == 1
+    assert bot.saved_ranges[0][1] - bot.saved_ranges[0][0] == 4
@@ -0,0 +1,38 @@
+import torch
+from Experience import PrioritizedReplayBuffer
+from nfsp_agent import NFSPAgent
+
+"""
+Replay buffer sampling.
+Run with: python -m pytest PokerBots/test_experience.py
+"""
+
+STATE_SIZE = 20
+
+
+#A random (state, action, reward, next_state, done) transition.
+def transition():
+    return (torch.rand(STATE_SIZE), 1, 1.0, torch.rand(STATE_SIZE), 0.0)
+
+
+def test_prioritized_sample_is_short_below_batch_size():
+    buffer = PrioritizedReplayBuffer.for_transitions(100, STATE_SIZE)
+    for _ in range(3):
+        buffer.push(transition())
+
+    columns, indices, weights = buffer.sample_prioritized(32)
+    assert len(columns[1]) == len(indices) == len(weights) == 3
+    assert sorted(indices.tolist()) == [0, 1, 2]
+
+    columns, indices, weights = PrioritizedReplayBuffer.for_transitions(100, STATE_SIZE).sample_prioritized(32)
+    assert len(columns[1]) == len(indices) == len(weights) == 0
+
+
+def test_prioritized_agent_skips_short_batches():
+    for prioritized in (False, True):
+        agent = NFSPAgent("short_batch", STATE_SIZE, 3, prioritized_replay=prioritized)
+        for _ in range(3):
+            agent.store_rl(transition())
+        before = [param.clone() for param in agent.q_net.parameters()]
+        agent.train_rl(batch_size=32)
+        assert all(torch.equal(a, b) for a, b in zip(before, agent.q_net.parameters()))
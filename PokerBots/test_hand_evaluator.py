@@ -0,0 +1,62 @@
+import random
+from itertools import combinations
+import numpy as np
+from GameLogic import Card, PokerHandEvaluator
+from hand_evaluator import evaluate_cards, evaluate_batch, pack_strength, unpack_strength
+
+"""
+Equivalence of hand_evaluator with PokerHandEvaluator.evaluate_five_card_hand:
+every five-card hand exhaustively, plus a seeded sample of 6- and 7-card hands.
+Run with: python -m pytest PokerBots/test_hand_evaluator.py
+"""
+
+DECK = [Card(code) for code in range(52)]
+SAMPLE_SIZE = 20000
+SEED = 1234
+
+
+#The reference (rank, tiebreakers) result for int cards, packed like evaluate_cards.
+def reference_strength(cards):
+    hand = [DECK[card] for card in cards]
+    if len(hand) == 5:
+        return pack_strength(*PokerHandEvaluator.evaluate_five_card_hand(hand))
+    return pack_strength(*PokerHandEvaluator.evaluate_five_card_hand(hand[:2], hand[2:]))
+
+
+#Seeded random hands of each size in sizes.
+def sampled_hands(sizes, count=SAMPLE_SIZE):
+    rng = random.Random(SEED)
+    return [rng.sample(range(52), size) for size in sizes for _ in range(count)]
+
+
+def test_every_five_card_hand_matches_reference():
+    mismatches = 0
+    for cards in combinations(range(52), 5):
+        if evaluate_cards(cards) != reference_strength(cards):
+            mismatches += 1
+    assert mismatches == 0
+
+
+def test_six_and_seven_card_hands_match_reference():
+    for cards in sampled_hands((6, 7)):
+        assert evaluate_cards(cards) == reference_strength(cards), [DECK[card] for card in cards]
+
+
+def test_ordering_matches_reference_tuples():
+    hands = sampled_hands((5, 6, 7), count=2000)
+    reference = [PokerHandEvaluator.evaluate_five_card_hand([DECK[c] for c in cards[:2]], [DECK[c] for c in cards[2:]])
+                 for cards in hands]
+    strengths = [evaluate_cards(cards) for cards in hands]
+    for (a, ref_a), (b, ref_b) in zip(zip(strengths, reference), zip(strengths[1:], reference[1:])):
+        assert (a > b) == ((ref_a[0], ref_a[1]) > (ref_b[0], ref_b[1]))
+        assert (a == b) == ((ref_a[0], ref_a[1]) == (ref_b[0], ref_b[1]))
+    for strength, ref in zip(strengths, reference):
+        assert unpack_strength(strength) == (ref[0], list(ref[1]))
+
+
+def test_batch_matches_evaluate_cards():
+    five = np.array(list(combinations(range(52), 5)), dtype=np.int64)
+    assert np.array_equal(evaluate_batch(five), [evaluate_cards(cards) for cards in five.tolist()])
+    for size in (6, 7):
+        hands = sampled_hands((size,))
+        assert evaluate_batch(hands).tolist() == [evaluate_cards(cards) for cards in hands]
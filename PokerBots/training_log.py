@@ -0,0 +1,179 @@
+import json
+import os
+
+"""
+Append-only training logs.
+
+Every finished round and every accuracy measurement is appended as one
+JSON line (round_log.jsonl, accuracy_log.jsonl), and the round totals are
+kept in memory, so logging costs the same on round 10 as on round 100000.
+compact_logs() folds the JSON lines into the aggregate files the plotting
+scripts read (round_wins.json and accuracy_log.json); GameLoop runs it
+before plotting, and it can be run by hand with:
+
+    python PokerBots/training_log.py
+"""
+
+ROUND_LOG = "round_log.jsonl"
+ACCURACY_LOG = "accuracy_log.jsonl"
+ROUND_WINS = "round_wins.json"
+ACCURACY_SUMMARY = "accuracy_log.json"
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+#Yields the records of a JSON-lines file, skipping a torn final line left by a crash.
+def _read_lines(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+#Adds one round record to a round_wins-style totals dict.
+def _count_round(round_wins, record):
+    round_wins["rounds_played"] = record["round"]
+    winner = record.get("winner")
+    if winner:
+        if winner not in round_wins:
+            round_wins[winner] = {"fold": 0, "showdown": 0}
+        round_wins[winner][record["win_type"]] += 1
+
+
+def load_round_wins(directory="training_logs"):
+    """
+    Round totals: the last compacted round_wins.json plus every logged round after it.
+    Returns:
+        dict shaped like round_wins.json ({"rounds_played": n, bot: {"fold": x, "showdown": y}})
+    """
+    round_wins = _read_json(os.path.join(directory, ROUND_WINS), {"rounds_played": 0})
+    compacted = round_wins["rounds_played"]
+    for record in _read_lines(os.path.join(directory, ROUND_LOG)):
+        if record["round"] > compacted:
+            _count_round(round_wins, record)
+    return round_wins
+
+
+def compact_logs(directory="training_logs"):
+    """
+    Rewrites round_wins.json and accuracy_log.json to include everything in the JSON-lines logs.
+    Returns:
+        (rounds played, accuracy entries)
+    """
+    round_wins = load_round_wins(directory)
+    _write_json(os.path.join(directory, ROUND_WINS), round_wins)
+
+    summary_path = os.path.join(directory, ACCURACY_SUMMARY)
+    accuracy = _read_json(summary_path, [])
+    last_round = accuracy[-1]["round"] if accuracy else 0
+    accuracy.extend(entry for entry in _read_lines(os.path.join(directory, ACCURACY_LOG)) if entry["round"] > last_round)
+    _write_json(summary_path, accuracy)
+    return round_wins["rounds_played"], len(accuracy)
+
+
+#Rewrites a JSON-lines file keeping only the records up to last_round.
+def _truncate_lines(path, last_round):
+    records = [record for record in _read_lines(path) if record["round"] <= last_round]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+    os.replace(tmp_path, path)
+
+
+def rewind_logs(directory, round_wins):
+    """
+    Drops every round and accuracy entry logged after round_wins["rounds_played"]
+    (e.g. by a run that crashed after its last checkpoint). round_wins is the
+    totals dict saved at that point; it replaces a compacted round_wins.json
+    that already counts later rounds.
+    """
+    rounds = round_wins["rounds_played"]
+    _truncate_lines(os.path.join(directory, ROUND_LOG), rounds)
+    _truncate_lines(os.path.join(directory, ACCURACY_LOG), rounds)
+
+    wins_path = os.path.join(directory, ROUND_WINS)
+    if _read_json(wins_path, {"rounds_played": 0})["rounds_played"] > rounds:
+        _write_json(wins_path, round_wins)
+    summary_path = os.path.join(directory, ACCURACY_SUMMARY)
+    if os.path.exists(summary_path):
+        _write_json(summary_path, [entry for entry in _read_json(summary_path, []) if entry["round"] <= rounds])
+
+
+class TrainingLog:
+    """
+    Running round totals plus open append handles for the JSON-lines logs.
+    Use TrainingLog.shared(directory) so every table in a process counts
+    rounds in the same sequence.
+    """
+
+    _shared = {}
+
+    def __init__(self, directory="training_logs"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.round_wins = load_round_wins(directory)
+        self.round_file = open(os.path.join(directory, ROUND_LOG), "a")
+        self.accuracy_file = open(os.path.join(directory, ACCURACY_LOG), "a")
+
+    @classmethod
+    def shared(cls, directory="training_logs"):
+        log = cls._shared.get(directory)
+        if log is None:
+            log = cls._shared[directory] = cls(directory)
+        return log
+
+    @property
+    def rounds_played(self):
+        return self.round_wins["rounds_played"]
+
+    def record_round(self, winner, win_type):
+        """
+        Appends one finished round and updates the running totals.
+        Returns:
+            dict: the round totals (same shape as round_wins.json).
+        """
+        record = {"round": self.rounds_played + 1, "winner": winner, "win_type": win_type}
+        _count_round(self.round_wins, record)
+        self.round_file.write(json.dumps(record) + "\n")
+        self.round_file.flush()
+        return self.round_wins
+
+    #Appends one {"round": n, bot name: accuracy, ...} entry.
+    def record_accuracy(self, entry):
+        self.accuracy_file.write(json.dumps(entry) + "\n")
+        self.accuracy_file.flush()
+
+    #Rewinds the logs and running totals to a checkpoint's round_wins (see rewind_logs).
+    def rewind(self, round_wins):
+        self.round_file.close()
+        self.accuracy_file.close()
+        rewind_logs(self.directory, round_wins)
+        self.round_wins = load_round_wins(self.directory)
+        self.round_file = open(os.path.join(self.directory, ROUND_LOG), "a")
+        self.accuracy_file = open(os.path.join(self.directory, ACCURACY_LOG), "a")
+
+    def compact(self):
+        self.round_file.flush()
+        self.accuracy_file.flush()
+        return compact_logs(self.directory)
+
+
+if __name__ == "__main__":
+    rounds, entries = compact_logs()
+    print(f"[LOGS] Compacted {rounds} rounds and {entries} accuracy entries")
@@ -0,0 +1,146 @@
+import copy
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Decides when the bots train, decoupled from the end of every hand.
+
+GameLoop reports each finished hand to its TrainingScheduler, which trains
+once every_hands hands or every_transitions new transitions (whichever comes
+first) and takes steps gradient steps per network each time. With
+background=True the update runs on a worker thread against a private copy
+of each agent's networks while play continues with the previous weights;
+the new weights are swapped in at the first hand end after it finishes.
+
+With use_grouped, tables whose bots a grouped_networks.GroupedNetworks
+covers train with one stacked update instead of one per bot.
+
+One scheduler can be shared by several tables (see simulation.py) so the
+cadence counts hands across all of them.
+"""
+
+
+class TrainingScheduler:
+    """
+    Counts finished hands and new transitions and trains the bots on a fixed
+    cadence, either inline or on a background thread.
+    """
+
+    def __init__(self, every_hands=1, every_transitions=0, steps=1, batch_size=32, gamma=0.99, background=False):
+        self.every_hands = every_hands
+        self.every_transitions = every_transitions
+        self.steps = steps
+        self.batch_size = batch_size
+        self.gamma = gamma
+        self.background = background
+        self.grouped = None  # Optional grouped_networks.GroupedNetworks, see use_grouped
+
+        self.hands_since_update = 0
+        self.transitions_since_update = 0
+        self.updates = 0
+
+        # Background mode: one learner copy per set of shared networks, and at most one job in flight
+        self.learners = weakref.WeakKeyDictionary()
+        self.executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self.pending = None
+
+    #Whether the hand or transition cadence has been reached.
+    def due(self):
+        if self.every_hands and self.hands_since_update >= self.every_hands:
+            return True
+        return bool(self.every_transitions) and self.transitions_since_update >= self.every_transitions
+
+    def hand_finished(self, bots):
+        """
+        Called by GameLoop after each hand with the table's BotWrappers.
+        Trains them if an update is due.
+        Returns:
+            bool: True if an update was run (or started, in background mode).
+        """
+        self.hands_since_update += 1
+        for bot in bots:
+            self.transitions_since_update += bot.new_transitions
+            bot.new_transitions = 0
+
+        if self.background:
+            self._apply_finished()
+            if self.pending is not None:
+                return False  # Still busy; stay due and retry at the next hand end
+        if not self.due():
+            return False
+
+        self.hands_since_update = 0
+        self.transitions_since_update = 0
+        self.updates += 1
+
+        if self.background:
+            self._start_background(bots)
+        elif self.grouped is not None and self.grouped.covers(bots):
+            self.grouped.train(bots, self.batch_size, self.gamma, steps=self.steps)
+        else:
+            for bot in bots:
+                bot.train(self.batch_size, self.gamma, steps=self.steps)
+        return True
+
+    #From now on, trains tables whose bots the GroupedNetworks covers with one stacked update instead of one per bot.
+    def use_grouped(self, networks):
+        if self.background:
+            raise ValueError("Grouped training runs inline; it can't be combined with background=True")
+        self.grouped = networks
+
+    #Snapshots each bot's imitation data and trains learner copies of its networks on the worker thread.
+    def _start_background(self, bots):
+        jobs = []
+        for bot in bots:
+            # Wrappers sharing networks (one per table) also share a learner
+            learner = self.learners.get(bot.agent.q_net)
+            if learner is None:
+                learner = copy.deepcopy(bot.agent)
+                self.learners[bot.agent.q_net] = learner
+            jobs.append((bot, learner, bot.agent.sl_buffer.arrays()))
+            # Already persisted to SQLite, which is where the learner reads RL data from
+            bot.agent.rl_buffer.clear()
+
+        def run():
+            for bot, learner, sl_columns in jobs:
+                learner.sl_buffer.clear()
+                learner.sl_buffer.push_batch(*sl_columns)
+                bot.train(self.batch_size, self.gamma, steps=self.steps, agent=learner)
+            return jobs
+
+        self.pending = self.executor.submit(run)
+
+    #Copies finished learner weights into the networks used for play.
+    def _apply_finished(self, wait=False):
+        if self.pending is None or not (wait or self.pending.done()):
+            return
+        jobs = self.pending.result()
+        self.pending = None
+        for bot, learner, _sl_columns in jobs:
+            bot.agent.q_net.load_state_dict(learner.q_net.state_dict())
+            bot.agent.policy_net.load_state_dict(learner.policy_net.state_dict())
+
+    #Cadence counters, for checkpoints.
+    def state_dict(self):
+        return {
+            "hands_since_update": self.hands_since_update,
+            "transitions_since_update": self.transitions_since_update,
+            "updates": self.updates,
+        }
+
+    def load_state_dict(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    #The agent whose optimisers are stepped for this one's networks: its learner copy in background mode.
+    def training_agent(self, agent):
+        return self.learners.get(agent.q_net, agent)
+
+    #Waits for any background update and applies it (call before saving or evaluating the bots).
+    def wait(self):
+        self._apply_finished(wait=True)
+
+    def close(self):
+        self.wait()
+        if self.executor:
+            self.executor.shutdown()